@@ -0,0 +1,349 @@
+"""
+Incremental drift statistics for the Evidently monitoring service.
+
+The reference dataset is profiled once (numeric histograms, category
+frequencies, text-length and hashed-token distributions) and cached on
+disk. The current window is a rolling sum of per-batch count vectors, so
+new data only costs a pass over the new rows and a refresh never re-reads
+the full CSVs.
+
+Drift cut-offs are calibrated, not fixed: sparse statistics (1024 token
+buckets, long-tailed categories) have a large Jensen–Shannon distance even
+between two i.i.d. samples. The profile measures that null distance by
+splitting the reference rows at random into halves many times, and scales
+its upper quantile to the actual window size (JS ∝ √(1/n_ref + 1/n_cur)
+for samples from one distribution).
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import jensenshannon
+
+TOKEN_PATTERN = r"[a-z0-9]+"
+
+
+@dataclass
+class ColumnSpec:
+    kind: str  # "numeric" | "categorical" | "text"
+    edges: np.ndarray | None = None  # numeric values / text lengths
+    vocab: pd.Index | None = None  # categorical; last bucket = "other"
+    n_token_buckets: int = 0  # text; hashed token space
+
+
+@dataclass
+class DriftSchema:
+    columns: dict[str, ColumnSpec] = field(default_factory=dict)
+
+    @classmethod
+    def infer(
+        cls,
+        df: pd.DataFrame,
+        n_bins: int = 20,
+        max_categories: int = 200,
+        n_token_buckets: int = 1024,
+    ) -> "DriftSchema":
+        """
+        Derive fixed binning from the reference so all windows are comparable.
+        String columns with more than `max_categories` distinct values (IDs)
+        are not profiled.
+        """
+        schema = cls()
+        for col in df.columns:
+            s = df[col].dropna()
+            if s.empty:
+                continue
+            if pd.api.types.is_numeric_dtype(s):
+                schema.columns[col] = ColumnSpec(
+                    "numeric", edges=_quantile_edges(s, n_bins)
+                )
+                continue
+
+            s = s.astype(str)
+            n_tokens = s.str.count(r"\s+") + 1
+            if n_tokens.mean() >= 3:
+                schema.columns[col] = ColumnSpec(
+                    "text",
+                    edges=_quantile_edges(n_tokens, n_bins),
+                    n_token_buckets=n_token_buckets,
+                )
+            elif s.nunique() <= max_categories:
+                vocab = s.value_counts().index
+                schema.columns[col] = ColumnSpec("categorical", vocab=pd.Index(vocab))
+        return schema
+
+    def count(self, df: pd.DataFrame) -> dict[tuple[str, str], np.ndarray]:
+        """Count vectors for one batch; additive across batches."""
+        out = {}
+        for col, spec in self.columns.items():
+            if col not in df.columns:
+                continue
+            s = df[col].dropna()
+            if spec.kind == "numeric":
+                out[(col, "hist")] = _bin_counts(
+                    pd.to_numeric(s, errors="coerce"), spec.edges
+                )
+            elif spec.kind == "categorical":
+                codes = spec.vocab.get_indexer(s.astype(str))
+                codes = np.where(codes < 0, len(spec.vocab), codes)  # unseen → other
+                out[(col, "freq")] = np.bincount(codes, minlength=len(spec.vocab) + 1)
+            else:
+                s = s.astype(str)
+                out[(col, "length")] = _bin_counts(s.str.count(r"\s+") + 1, spec.edges)
+                tokens = s.str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+                hashed = (
+                    pd.util.hash_array(tokens.to_numpy(dtype=object))
+                    % spec.n_token_buckets
+                )
+                out[(col, "tokens")] = np.bincount(
+                    hashed.astype(np.int64), minlength=spec.n_token_buckets
+                )
+        return out
+
+
+def _quantile_edges(s: pd.Series, n_bins: int) -> np.ndarray:
+    # open-ended outer bins so unseen extremes in the current window still count
+    qs = np.unique(np.quantile(s.to_numpy(dtype=float), np.linspace(0, 1, n_bins + 1)))
+    inner = qs[1:-1] if qs.size > 2 else qs[:1]
+    return np.concatenate([[-np.inf], inner, [np.inf]])
+
+
+def _bin_counts(values: pd.Series, edges: np.ndarray) -> np.ndarray:
+    v = values.dropna().to_numpy(dtype=float)
+    idx = np.searchsorted(edges, v, side="right") - 1
+    return np.bincount(np.clip(idx, 0, edges.size - 2), minlength=edges.size - 1)
+
+
+def _js(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return jensenshannon(a + 1e-9, b + 1e-9, axis=-1, base=2)
+
+
+def null_scales(
+    blocks: list[dict[tuple[str, str], np.ndarray]],
+    n_permutations: int = 200,
+    alpha: float = 0.01,
+    seed: int = 0,
+) -> dict[tuple[str, str], float]:
+    """
+    Per statistic, the (1 − alpha) quantile of JS between two random halves
+    of the reference, divided by √(1/n₁ + 1/n₂). `blocks` are the counts of
+    disjoint random row blocks; halves are random unions of blocks.
+    """
+    rng = np.random.default_rng(seed)
+    n_blocks = len(blocks)
+    if n_blocks < 2:
+        return {}
+    assign = np.zeros((n_permutations, n_blocks), dtype=bool)
+    for p in range(n_permutations):
+        assign[p, rng.permutation(n_blocks)[: n_blocks // 2]] = True
+    rows = np.array([b[("_rows", "n")][0] for b in blocks], dtype=float)
+    n1, n2 = assign @ rows, ~assign @ rows
+    size = np.sqrt(1 / n1 + 1 / n2)
+
+    scales = {}
+    for key in blocks[0]:
+        if key[0] == "_rows":
+            continue
+        counts = np.stack([b[key] for b in blocks]).astype(float)
+        a, b = assign @ counts, ~assign @ counts
+        ok = (a.sum(axis=1) > 0) & (b.sum(axis=1) > 0)
+        if ok.any():
+            scales[key] = float(np.quantile(_js(a[ok], b[ok]) / size[ok], 1 - alpha))
+    return scales
+
+
+def drift_scores(
+    reference: dict[tuple[str, str], np.ndarray],
+    current: dict[tuple[str, str], np.ndarray],
+    thresholds: dict[tuple[str, str], float],
+    drift_share: float = 0.5,
+) -> dict:
+    """
+    Jensen–Shannon distance per (column, statistic); a column drifts if any of
+    its statistics exceed its threshold, the dataset drifts if at least
+    `drift_share` of the columns do. Statistics without a threshold are skipped.
+    """
+    columns: dict[str, dict] = {}
+    for (col, stat), ref in reference.items():
+        cur = current.get((col, stat))
+        limit = thresholds.get((col, stat))
+        if cur is None or limit is None or cur.sum() == 0 or ref.sum() == 0:
+            continue
+        score = float(_js(ref, cur))
+        entry = columns.setdefault(
+            col, {"drift_detected": False, "stats": {}, "thresholds": {}}
+        )
+        entry["stats"][stat] = score
+        entry["thresholds"][stat] = limit
+        entry["drift_detected"] |= bool(score > limit)
+
+    n_drifted = sum(c["drift_detected"] for c in columns.values())
+    return {
+        "number_of_columns": len(columns),
+        "number_of_drifted_columns": n_drifted,
+        "dataset_drift": bool(columns) and n_drifted / len(columns) >= drift_share,
+        "columns": columns,
+    }
+
+
+class ReferenceProfile:
+    """
+    Schema + reference counts + null-distance scales (see null_scales) +
+    a bounded raw sample for the HTML report.
+    """
+
+    def __init__(
+        self,
+        schema: DriftSchema,
+        counts: dict,
+        sample: pd.DataFrame,
+        n_rows: int,
+        scales: dict | None = None,
+    ):
+        self.schema = schema
+        self.counts = counts
+        self.sample = sample
+        self.n_rows = n_rows
+        self.scales = scales or {}
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        sample_rows: int = 5_000,
+        n_blocks: int = 64,
+        alpha: float = 0.01,
+        **schema_kwargs,
+    ):
+        schema = DriftSchema.infer(df, **schema_kwargs)
+        sample = df.sample(min(sample_rows, len(df)), random_state=0) if len(df) else df
+
+        # count random row blocks once; their sum is the reference, their random
+        # halves give the null distribution
+        block_of = np.random.default_rng(0).permutation(len(df)) % max(
+            1, min(n_blocks, len(df))
+        )
+        blocks = []
+        for b in range(int(block_of.max()) + 1 if len(df) else 0):
+            part = df[block_of == b]
+            blocks.append({**schema.count(part), ("_rows", "n"): np.array([len(part)])})
+        counts = {
+            key: np.sum([blk[key] for blk in blocks], axis=0)
+            for key in (blocks[0] if blocks else {})
+            if key[0] != "_rows"
+        }
+        scales = null_scales(blocks, alpha=alpha)
+        return cls(schema, counts, sample.reset_index(drop=True), len(df), scales)
+
+    def thresholds(self, n_current: int) -> dict[tuple[str, str], float]:
+        """Null-distance cut-off per statistic for a current window of `n_current` rows."""
+        if n_current <= 0 or self.n_rows <= 0:
+            return {}
+        size = np.sqrt(1 / self.n_rows + 1 / n_current)
+        return {key: float(scale * size) for key, scale in self.scales.items()}
+
+    @classmethod
+    def load(
+        cls, csv_path: str | Path, cache_dir: str | Path, **kwargs
+    ) -> "ReferenceProfile":
+        """Profile `csv_path` once; later calls hit the on-disk cache until the file changes."""
+        csv_path = Path(csv_path)
+        st = os.stat(csv_path)
+        key = f"v2|{csv_path.resolve()}|{st.st_size}|{st.st_mtime_ns}|{sorted(kwargs.items())}"
+        cache = (
+            Path(cache_dir)
+            / f"reference-{hashlib.sha1(key.encode()).hexdigest()[:16]}.pkl"
+        )
+        if cache.exists():
+            with open(cache, "rb") as f:
+                return pickle.load(f)
+
+        profile = cls.from_frame(pd.read_csv(csv_path), **kwargs)
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(profile, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)
+        return profile
+
+
+class DriftMonitor:
+    """
+    Rolling current window over the last `max_batches` batches.
+    update() is O(batch); the window total is kept as a running sum.
+    """
+
+    def __init__(
+        self,
+        reference: ReferenceProfile,
+        max_batches: int = 50,
+        sample_rows: int = 5_000,
+    ):
+        self.reference = reference
+        self.max_batches = max_batches
+        self.sample_rows = sample_rows
+        self._batches: deque[tuple[int, dict]] = deque()
+        self._totals: dict[tuple[str, str], np.ndarray] = {}
+        self._n_rows = 0
+        self._sample = reference.sample.iloc[0:0]
+        self._lock = threading.Lock()
+
+    def update(self, batch: pd.DataFrame) -> int:
+        counts = self.reference.schema.count(batch)  # heavy part, outside the lock
+        with self._lock:
+            self._batches.append((len(batch), counts))
+            self._n_rows += len(batch)
+            for key, vec in counts.items():
+                if key in self._totals:
+                    self._totals[key] = self._totals[key] + vec
+                else:
+                    self._totals[key] = vec.copy()
+            while len(self._batches) > self.max_batches:
+                n_old, old = self._batches.popleft()
+                self._n_rows -= n_old
+                for key, vec in old.items():
+                    self._totals[key] = self._totals[key] - vec
+            self._sample = pd.concat([self._sample, batch], ignore_index=True).tail(
+                self.sample_rows
+            )
+            return self._n_rows
+
+    def reset(self):
+        with self._lock:
+            self._batches.clear()
+            self._totals = {}
+            self._n_rows = 0
+            self._sample = self.reference.sample.iloc[0:0]
+
+    def current_sample(self) -> pd.DataFrame:
+        with self._lock:
+            return self._sample
+
+    def current_counts(self) -> dict[tuple[str, str], np.ndarray]:
+        """Count vectors summed over the batches in the window."""
+        with self._lock:
+            return {key: vec.copy() for key, vec in self._totals.items()}
+
+    def summary(self) -> dict:
+        with self._lock:
+            totals = dict(self._totals)
+            n_rows, n_batches = self._n_rows, len(self._batches)
+        out = drift_scores(
+            self.reference.counts, totals, self.reference.thresholds(n_rows)
+        )
+        out.update(
+            {
+                "reference_rows": self.reference.n_rows,
+                "current_rows": n_rows,
+                "current_batches": n_batches,
+            }
+        )
+        return out
@@ -1,52 +1,98 @@
-import pandas as pd
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from evidently.report import Report
-from evidently.metric_preset import DataDriftPreset
-from evidently.metrics import DataDriftTable
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-# Initialize FastAPI app
-app = FastAPI(title="Evidently Drift Dashboard")
+from fastapi import FastAPI, HTTPException
+from fastapi.staticfiles import StaticFiles
+
+# pandas/scipy (monitoring.drift_stats, monitoring.serving_drift) and Evidently
+# are imported inside the worker jobs below, so the service is up in well
+# under a second and /health never waits on them.
 
+REFERENCE_PATH = "data/splits/train/train_set.csv"
+CURRENT_PATH = "data/splits/test/test_set.csv"
+CACHE_DIR = "monitoring/.cache"
+REPORT_PATH = "monitoring/evidently_report.html"
+SERVING_LOG_DIR = os.getenv("SERVING_LOG_DIR", "logs/serving")
 
-# Load reference and current datasets
-def load_datasets():
-    # Load your training data as reference
-    reference_data = pd.read_csv("data/splits/train/train_set.csv")
+# All heavy work (profiling, Evidently report) runs on this single worker so
+# the event loop and startup never wait on it; jobs are naturally serialized.
+_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drift")
+_queued: Future | None = None
+_queue_lock = threading.Lock()
 
-    # Load your test data as current
-    current_data = pd.read_csv("data/splits/test/test_set.csv")
+state = {"monitor": None, "status": "starting", "last_report": None, "error": None}
+_serving = {"monitor": None}
+_serving_lock = threading.Lock()
 
-    return reference_data, current_data
+
+def load_monitor():
+    import pandas as pd
+    from monitoring.drift_stats import DriftMonitor, ReferenceProfile
+
+    # Reference stats are cached on disk; only the current split is scanned
+    reference = ReferenceProfile.load(REFERENCE_PATH, CACHE_DIR)
+    monitor = DriftMonitor(reference)
+    for chunk in pd.read_csv(CURRENT_PATH, chunksize=10_000):
+        monitor.update(chunk)
+    state["monitor"] = monitor
 
 
 def generate_drift_report():
-    reference_data, current_data = load_datasets()
+    from evidently.report import Report
+    from evidently.metric_preset import DataDriftPreset
+    from evidently.metrics import DataDriftTable
 
-    # Create Data Drift Report
-    drift_report = Report(metrics=[DataDriftPreset(), DataDriftTable()])
+    monitor = state["monitor"]
 
-    # Calculate drift
-    drift_report.run(reference_data=reference_data, current_data=current_data)
+    # Create Data Drift Report on bounded samples, not the full datasets
+    drift_report = Report(metrics=[DataDriftPreset(), DataDriftTable()])
+    drift_report.run(
+        reference_data=monitor.reference.sample, current_data=monitor.current_sample()
+    )
 
     # Save the report
-    drift_report.save_html("monitoring/evidently_report.html")
+    drift_report.save_html(REPORT_PATH)
 
 
 def update_dashboard():
     try:
+        if state["monitor"] is None:
+            load_monitor()
+        state["status"] = "running"
         generate_drift_report()
-        return {"status": "success", "timestamp": datetime.now().isoformat()}
+        state.update(status="ready", last_report=datetime.now().isoformat(), error=None)
     except Exception as e:
-        return {"status": "error", "error": str(e)}
+        state.update(status="error", error=str(e))
 
 
-# Generate initial report
-generate_drift_report()
+def schedule_refresh() -> str:
+    """Queue a report rebuild; a refresh already waiting in the queue absorbs new requests."""
+    global _queued
+    with _queue_lock:
+        if _queued is not None and not _queued.running() and not _queued.done():
+            return "already_queued"
+        _queued = _worker.submit(update_dashboard)
+        return "scheduled"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    schedule_refresh()  # initial report builds in the background
+    yield
+    _worker.shutdown(wait=False, cancel_futures=True)
+
+
+# Initialize FastAPI app
+app = FastAPI(title="Evidently Drift Dashboard", lifespan=lifespan)
 
-# Mount the static files directory
-app.mount("/", StaticFiles(directory="monitoring", html=True), name="static")
+
+def _monitor():
+    if state["monitor"] is None:
+        raise HTTPException(status_code=503, detail="Drift monitor is still loading")
+    return state["monitor"]
 
 
 @app.get("/health")
@@ -54,9 +100,59 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/live")
+async def liveness():
+    return {"status": "healthy"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    body = {k: v for k, v in state.items() if k != "monitor"}
+    if state["monitor"] is None:
+        raise HTTPException(status_code=503, detail=body)
+    return body
+
+
 @app.post("/refresh")
 async def refresh_dashboard():
-    return update_dashboard()
+    return {
+        "status": schedule_refresh(),
+        "report": state["status"],
+        "last_report": state["last_report"],
+        "error": state["error"],
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.get("/drift")
+def drift_summary():
+    return _monitor().summary()
+
+
+@app.get("/serving")
+def serving_drift():
+    # picks up batches flushed by the recommender API since the last call
+    with _serving_lock:
+        if _serving["monitor"] is None:
+            from monitoring.serving_drift import ServingDriftMonitor
+
+            _serving["monitor"] = ServingDriftMonitor(SERVING_LOG_DIR)
+        monitor = _serving["monitor"]
+        new_batches = monitor.poll()
+    return {"new_batches": new_batches, **monitor.summary()}
+
+
+@app.post("/batches")
+def ingest_batch(records: list[dict]):
+    # sync route → runs in the threadpool, counting never blocks the event loop
+    import pandas as pd
+
+    n_rows = _monitor().update(pd.DataFrame.from_records(records))
+    return {"status": "ok", "current_rows": n_rows}
+
+
+# Mount the static files directory last so it doesn't shadow the API routes
+app.mount("/", StaticFiles(directory="monitoring", html=True), name="static")
 
 
 if __name__ == "__main__":
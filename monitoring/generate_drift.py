@@ -1,10 +1,15 @@
+import json
+import os
+
 import pandas as pd
 from evidently.report import Report
 from evidently.metric_preset import DataDriftPreset
 
-# Load your reference (training) and current (hold-out or recent prod batch)
-ref = pd.read_csv("data/raw/amazon.csv")
-cur = pd.read_csv("data/raw/amazon.csv")
+from monitoring.serving_drift import ServingDriftMonitor
+
+# Reference = training split, current = hold-out split (same as the drift service)
+ref = pd.read_csv("data/splits/train/train_set.csv")
+cur = pd.read_csv("data/splits/test/test_set.csv")
 
 report = Report(metrics=[DataDriftPreset()])
 report.run(reference_data=ref, current_data=cur)
@@ -12,3 +17,8 @@ report.run(reference_data=ref, current_data=cur)
 # Save static HTML report
 report.save_html("monitoring/evidently_report.html")
 print("Saved: monitoring/evidently_report.html")
+
+# Drift in what the API actually served, if it has been logging
+serving = ServingDriftMonitor(os.getenv("SERVING_LOG_DIR", "logs/serving"))
+if serving.poll():
+    print(json.dumps(serving.summary(), indent=2))
@@ -0,0 +1,143 @@
+"""
+Drift on what the recommender actually serves.
+
+Consumes the binary batches written by the API's ServingLog
+(src/ml/serving_log.py) and tracks, against a baseline made of the first
+`baseline_records` served records:
+  - catalog coverage of the current window
+  - popularity skew (Gini + share of traffic on the top 1% of items)
+  - popularity and score-distribution drift (Jensen–Shannon distance)
+"""
+
+from __future__ import annotations
+import threading
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+from scipy.spatial.distance import jensenshannon
+
+from ml.serving_log import read_batch
+
+# item–item scores are sums of cosines: ≥ 0, long right tail
+SCORE_EDGES = np.concatenate([[-np.inf, 0.0], np.geomspace(1e-3, 100.0, 40), [np.inf]])
+
+
+def gini(counts: np.ndarray) -> float:
+    """0 = every item recommended equally often, → 1 = all traffic on one item."""
+    if counts.sum() == 0:
+        return 0.0
+    x = np.sort(counts.astype(np.float64))
+    n = x.size
+    return float((2 * np.arange(1, n + 1) - n - 1) @ x / (n * x.sum()))
+
+
+def _js(p: np.ndarray, q: np.ndarray) -> float | None:
+    if p.sum() == 0 or q.sum() == 0:
+        return None
+    return float(jensenshannon(p + 1e-9, q + 1e-9, base=2))
+
+
+class ServingDriftMonitor:
+    def __init__(
+        self,
+        log_dir: str | Path,
+        baseline_records: int = 10_000,
+        max_batches: int = 100,
+        delete_consumed: bool = False,
+    ):
+        self.log_dir = Path(log_dir)
+        self.baseline_records = baseline_records
+        self.max_batches = max_batches
+        self.delete_consumed = delete_consumed
+        self._lock = threading.Lock()
+        self._seen_files: set[str] = set()
+        self._reset(n_items=0)
+
+    def _reset(self, n_items: int):
+        self.n_items = n_items
+        self._base_pop = np.zeros(n_items, dtype=np.int64)
+        self._base_scores = np.zeros(SCORE_EDGES.size - 1, dtype=np.int64)
+        self._base_n = 0
+        self._window: deque[tuple[int, np.ndarray, np.ndarray]] = deque()
+        self._pop = np.zeros(n_items, dtype=np.int64)
+        self._scores = np.zeros(SCORE_EDGES.size - 1, dtype=np.int64)
+        self._n = 0
+
+    @staticmethod
+    def _count(records: np.ndarray, n_items: int):
+        # mask out unused tail slots of records with k < K_MAX
+        valid = np.arange(records["items"].shape[1]) < records["k"][:, None]
+        items = records["items"][valid]
+        scores = records["scores"][valid]
+        scores = scores[np.isfinite(scores)]
+        pop = np.bincount(items[(items >= 0) & (items < n_items)], minlength=n_items)
+        hist = np.bincount(
+            np.searchsorted(SCORE_EDGES, scores, side="right") - 1,
+            minlength=SCORE_EDGES.size - 1,
+        )
+        return pop, hist
+
+    def add(self, records: np.ndarray, n_items: int):
+        with self._lock:
+            if n_items != self.n_items:  # new model/catalog → start over
+                self._reset(n_items)
+            pop, hist = self._count(records, n_items)
+            if self._base_n < self.baseline_records:
+                self._base_pop += pop
+                self._base_scores += hist
+                self._base_n += len(records)
+                return
+
+            self._window.append((len(records), pop, hist))
+            self._pop += pop
+            self._scores += hist
+            self._n += len(records)
+            while len(self._window) > self.max_batches:
+                n_old, pop_old, hist_old = self._window.popleft()
+                self._pop -= pop_old
+                self._scores -= hist_old
+                self._n -= n_old
+
+    def poll(self) -> int:
+        """Consume batch files that appeared since the last poll."""
+        if not self.log_dir.exists():
+            return 0
+        paths = sorted(self.log_dir.glob("batch-*.npz"))
+        new = [p for p in paths if p.name not in self._seen_files]
+        for path in new:
+            records, n_items = read_batch(path)
+            self.add(records, n_items)
+            self._seen_files.add(path.name)
+            if self.delete_consumed:
+                path.unlink(missing_ok=True)
+        # forget files that were rotated away so the set stays bounded
+        self._seen_files &= {p.name for p in paths}
+        return len(new)
+
+    def summary(self) -> dict:
+        with self._lock:
+            base_pop, base_scores = self._base_pop.copy(), self._base_scores.copy()
+            pop, scores, n = self._pop.copy(), self._scores.copy(), self._n
+            base_n, n_items = self._base_n, self.n_items
+
+        def stats(pop_counts):
+            total = pop_counts.sum()
+            top = max(1, n_items // 100)
+            return {
+                "coverage": (
+                    float(np.count_nonzero(pop_counts) / n_items) if n_items else 0.0
+                ),
+                "gini": gini(pop_counts),
+                "top1pct_share": (
+                    float(np.sort(pop_counts)[-top:].sum() / total) if total else 0.0
+                ),
+            }
+
+        return {
+            "n_items": n_items,
+            "baseline": {"records": base_n, **stats(base_pop)},
+            "current": {"records": n, **stats(pop)},
+            "popularity_drift_js": _js(base_pop, pop),
+            "score_drift_js": _js(base_scores, scores),
+        }
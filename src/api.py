@@ -1,10 +1,48 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Counter, Histogram
+from pydantic import BaseModel, Field, model_validator
+import os
+import threading
 import time
 from fastapi.responses import RedirectResponse
 
-app = FastAPI(title="Sentiment API")
+MODEL_PATH = os.getenv(
+    "SENTIMENT_MODEL_PATH",
+    os.path.join(os.path.dirname(__file__), "../artifacts/sentiment.joblib"),
+)
+
+# Trained by src/train_sentiment.py. Loaded (with sklearn) in a background
+# thread at startup; /predict returns 503 until then or if it is missing.
+state = {"model": None, "status": "not_started", "error": None}
+
+
+def _load_model():
+    state["status"] = "loading"
+    try:
+        from ml.sentiment.model import SentimentModel
+
+        if not os.path.exists(MODEL_PATH):
+            raise FileNotFoundError(f"Sentiment model not found at {MODEL_PATH}")
+        state["model"] = SentimentModel.load(
+            MODEL_PATH, cache_size=int(os.getenv("SENTIMENT_CACHE_SIZE", "100000"))
+        )
+        state["status"] = "ready"
+    except Exception as e:
+        state.update(status="error", error=str(e))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("STARTUP_MODE", "background") == "blocking":
+        _load_model()
+    else:
+        threading.Thread(target=_load_model, name="model-loader", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Sentiment API", lifespan=lifespan)
 
 # Auto-instrument HTTP metrics at /metrics
 Instrumentator().instrument(app).expose(app)
@@ -14,9 +52,44 @@ PREDICTION_COUNT = Counter("predictions_total", "Number of predictions served")
 PREDICTION_LATENCY = Histogram("prediction_latency_seconds", "Latency of predictions")
 
 
+class Review(BaseModel):
+    review_title: str = ""
+    review_content: str = ""
+
+    @model_validator(mode="after")
+    def _not_blank(self):
+        if not (self.review_title.strip() or self.review_content.strip()):
+            raise ValueError("review_title or review_content must not be empty")
+        return self
+
+    def text(self) -> str:
+        # same concatenation as ml.sentiment.model.review_text()
+        return f"{self.review_title} {self.review_content}"
+
+
+class ReviewBatch(BaseModel):
+    reviews: list[Review] = Field(..., min_length=1, max_length=10_000)
+
+
+def _predict(texts: list[str]) -> list[dict]:
+    model = state["model"]
+    if model is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Sentiment model not loaded ({state['error'] or state['status']})",
+        )
+    start = time.time()
+    result = model.predict(texts)
+    duration = time.time() - start
+
+    PREDICTION_COUNT.inc(len(texts))
+    PREDICTION_LATENCY.observe(duration)
+    return result
+
+
 @app.get("/")
 def home():
-    return {"ok": True, "routes": ["/docs", "/metrics", "/predict"]}
+    return {"ok": True, "routes": ["/docs", "/metrics", "/predict", "/predict/batch"]}
 
 
 @app.get("/")
@@ -29,13 +102,24 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/live")
+def liveness():
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+def readiness():
+    body = {k: v for k, v in state.items() if k != "model"}
+    if state["model"] is None:
+        raise HTTPException(status_code=503, detail=body)
+    return body
+
+
 @app.post("/predict")
-def predict(payload: dict):
-    start = time.time()
-    # ... your model inference here ...
-    result = {"label": "positive", "score": 0.93}
-    duration = time.time() - start
+def predict(payload: Review):
+    return _predict([payload.text()])[0]
 
-    PREDICTION_COUNT.inc()
-    PREDICTION_LATENCY.observe(duration)
-    return result
+
+@app.post("/predict/batch")
+def predict_batch(payload: ReviewBatch):
+    return {"predictions": _predict([r.text() for r in payload.reviews])}
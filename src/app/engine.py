@@ -0,0 +1,295 @@
+# project/src/app/engine.py
+
+"""
+Recommender serving engine: artifacts + scoring.
+
+Kept out of main.py so the web app imports in a fraction of a second;
+main.py imports this module inside _load_engine(), which the lifespan
+handler runs in a background thread at startup and which constructs
+RecommenderEngine(artifact_dir) (numpy/scipy/joblib and the artifacts are
+only paid for there).
+"""
+
+from __future__ import annotations
+import csv
+import os
+import threading
+
+import joblib
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from ml.encoders import IdEncoder, load_id_artifacts
+from ml.recommenders.content import blend_similar
+from ml.recommenders.filters import FilterError, FilterIndex
+from ml.recommenders.interactions import CapacityError, InteractionStore
+from ml.recommenders.neighbours import load_neighbours
+from ml.recommenders.sharded import ShardedScorer
+from ml.serving_log import ServingLog
+
+
+class RecommenderEngine:
+    # so main.py can catch these without importing ml.* at startup
+    FilterError = FilterError
+    CapacityError = CapacityError
+
+    def __init__(self, artifact_dir: str):
+        def load(name):
+            return joblib.load(os.path.join(artifact_dir, name))
+
+        # ID encoders are memory-mapped (see ml/encoders.py)
+        self.user2idx, self.prod2idx, self.catalog, self.product_names = (
+            load_id_artifacts(artifact_dir)
+        )
+        # SCORING_SHARDS > 0: score /recommend across item-partitioned worker processes;
+        # this process then only memory-maps the matrix for /similar rows
+        n_shards = int(os.getenv("SCORING_SHARDS", "0"))
+        self.item_item_sim = joblib.load(
+            os.path.join(artifact_dir, "item_item_sim.pkl"),
+            mmap_mode="r" if n_shards else None,
+        )
+        self.scorer = (
+            ShardedScorer.spawn(
+                os.path.join(artifact_dir, "item_item_sim.pkl"), n_shards
+            )
+            if n_shards > 0
+            else None
+        )
+        self.user_item_sparse = load("user_item_sparse.pkl")
+        n_items = len(self.prod2idx)
+
+        # Near-duplicate listings were folded onto one canonical ID before R was built
+        # (src/build_artifacts.py dedup_products stage); requests may still use any of them
+        canonical_path = os.path.join(artifact_dir, "product_canonical.csv")
+        self.canonical: dict[str, str] = {}
+        if os.path.exists(canonical_path):
+            with open(canonical_path, newline="", encoding="utf-8") as fh:
+                rows = csv.reader(fh)
+                next(rows, None)  # header
+                self.canonical = {pid: canon for pid, canon in rows}
+
+        # Content neighbours (src/build_content_sim.py) are optional; without them
+        # /similar falls back to CF only, over the CF item space.
+        content_path = os.path.join(artifact_dir, "content_neighbours.npz")
+        if os.path.exists(content_path):
+            self.content_nn, content_ids = load_neighbours(content_path)
+            same = len(content_ids) == len(self.catalog) and np.array_equal(
+                content_ids, self.catalog.decode(np.arange(len(self.catalog)))
+            )
+            self.content2idx = self.catalog if same else IdEncoder.from_ids(content_ids)
+        else:
+            self.content_nn = csr_matrix((n_items, n_items), dtype=np.float32)
+            self.content2idx = self.prod2idx
+        self.cf_to_content = self.content2idx.encode(
+            self.prod2idx.decode(np.arange(n_items))
+        )
+        # content items that are duplicate listings: never returned by /similar
+        self.content_canonical = None
+        if self.canonical:
+            dup = self.content2idx.encode(list(self.canonical))
+            self.content_canonical = np.ones(len(self.content2idx), dtype=bool)
+            self.content_canonical[dup[dup >= 0]] = False
+
+        # Bitmap filter index (catalog order), re-indexed to the CF and content item spaces
+        filters_path = os.path.join(artifact_dir, "filters.npz")
+        self.item_filters = self.content_filters = None
+        if os.path.exists(filters_path):
+            filters = FilterIndex.load(filters_path)
+            self.item_filters = filters.take(
+                self.catalog.encode(self.prod2idx.decode(np.arange(n_items)))
+            )
+            n_content = len(self.content2idx)
+            self.content_filters = (
+                filters
+                if self.content2idx is self.catalog
+                else filters.take(
+                    self.catalog.encode(self.content2idx.decode(np.arange(n_content)))
+                )
+            )
+
+        # Live interactions: base CSR + delta overlay, compacted periodically
+        self.interaction_store = InteractionStore(
+            self.user_item_sparse,
+            max_pending=int(os.getenv("EVENTS_MAX_PENDING", "50000")),
+            compact_interval_s=float(os.getenv("EVENTS_COMPACT_INTERVAL_S", "300")),
+            max_overlay=int(os.getenv("EVENTS_MAX_OVERLAY", "200000")),
+            max_new_users=int(os.getenv("EVENTS_MAX_NEW_USERS", "100000")),
+        )
+        self._user_lock = threading.Lock()
+
+        # Sampled log of served recommendations, flushed in the background for drift monitoring
+        self.serving_log = ServingLog(
+            os.getenv("SERVING_LOG_DIR", "logs/serving"),
+            n_items=n_items,
+            sample_rate=float(os.getenv("SERVING_LOG_SAMPLE_RATE", "0.1")),
+            flush_interval_s=float(os.getenv("SERVING_LOG_FLUSH_INTERVAL_S", "5")),
+        ).start()
+
+    def close(self):
+        self.serving_log.stop()
+        if self.scorer is not None:
+            self.scorer.close()
+
+    def get_product_name(self, pid: str) -> str:
+        j = self.catalog.get(str(pid))
+        return str(pid) if j is None else self.product_names[j]
+
+    def _describe(self, pids: list[str], scores, key: str) -> list[dict]:
+        jj = self.catalog.encode(pids)
+        return [
+            {
+                "product_id": pid,
+                key: float(s),
+                "product_name": self.product_names[j] if j >= 0 else pid,
+            }
+            for pid, s, j in zip(pids, scores, jj)
+        ]
+
+    @staticmethod
+    def _mask(index: FilterIndex | None, filters: dict | None):
+        # a bound is given when it is not None (0 is a real bound); an empty
+        # category list means "no category constraint", like an absent one
+        active = {
+            name: v
+            for name, v in (filters or {}).items()
+            if v is not None and not (name == "categories" and len(v) == 0)
+        }
+        if not active:
+            return None
+        if index is None:
+            raise FilterError(
+                "Filters are unavailable: artifacts/filters.npz was not built"
+            )
+        return index.mask(**active)
+
+    def recommend_for_user(
+        self,
+        user_id: str,
+        k: int = 10,
+        exclude_seen: bool = True,
+        filters: dict | None = None,
+    ):
+        """
+        None for unknown users, [] for users without interactions.
+        `filters`: FilterIndex.mask() keyword arguments, applied before top-k.
+        """
+        if user_id not in self.user2idx:
+            return None
+        mask = self._mask(self.item_filters, filters)
+        k = min(k, len(self.prod2idx))
+
+        uidx = self.user2idx[user_id]
+        interacted_items = self.interaction_store.seen(uidx)
+
+        if interacted_items.size == 0:
+            return []
+
+        if self.scorer is not None:
+            row = csr_matrix(
+                (
+                    np.ones(interacted_items.size, dtype=np.float32),
+                    interacted_items,
+                    [0, interacted_items.size],
+                ),
+                shape=(1, len(self.prod2idx)),
+            )
+            topk_idx, topk_scores = self.scorer.topk(row, k, exclude_seen, mask)
+            topk_idx, topk_scores = topk_idx[0], topk_scores[0]
+        else:
+            scores = self.item_item_sim[:, interacted_items].sum(axis=1)
+
+            if exclude_seen:
+                scores[interacted_items] = -np.inf
+            if mask is not None:
+                scores[~mask] = -np.inf
+
+            topk_idx = np.argpartition(scores, -k)[-k:]
+            topk_idx = topk_idx[np.argsort(scores[topk_idx])[::-1]]
+            topk_scores = scores[topk_idx]
+        keep = np.isfinite(topk_scores)  # fewer than k items left after exclusions
+        topk_idx, topk_scores = topk_idx[keep], topk_scores[keep]
+        self.serving_log.record(uidx, topk_idx, topk_scores)
+
+        return self._describe(
+            self.prod2idx.decode(topk_idx).tolist(), topk_scores, "score"
+        )
+
+    def similar_products(
+        self,
+        product_id: str,
+        k: int = 10,
+        content_weight: float = 0.3,
+        filters: dict | None = None,
+    ):
+        pid = self.canonical.get(str(product_id), str(product_id))
+        mask = self._mask(self.content_filters, filters)
+        if self.content_canonical is not None:
+            mask = (
+                self.content_canonical
+                if mask is None
+                else mask & self.content_canonical
+            )
+        j_content = self.content2idx.get(pid)
+        j_cf = self.prod2idx.get(pid)
+        if j_content is None and j_cf is None:
+            return []
+
+        idx, sims = blend_similar(
+            j_content,
+            j_cf,
+            self.content_nn,
+            self.item_item_sim,
+            self.cf_to_content,
+            content_weight,
+            k,
+            mask,
+        )
+        return self._describe(self.content2idx.decode(idx).tolist(), sims, "similarity")
+
+    def _user_index(self, user_id: str) -> int:
+        uidx = self.user2idx.get(user_id)
+        if uidx is None:
+            with self._user_lock:
+                uidx = self.user2idx.get(user_id)
+                if uidx is None:
+                    uidx = self.user2idx.add(user_id, self.interaction_store.add_user())
+        return uidx
+
+    def ingest(self, events) -> dict:
+        """
+        events: iterable of (user_id, product_id). Stops at the first event the
+        interaction store has no room for; it and the rest count as throttled.
+        """
+        events = list(events)
+        user_ids = [str(u) for u, _ in events]
+        users = self.user2idx.encode(user_ids).tolist()
+        pids = [str(p) for _, p in events]
+        items = self.prod2idx.encode([self.canonical.get(p, p) for p in pids]).tolist()
+
+        accepted = duplicate = rejected = 0
+        reason = None
+        for user_id, uidx, iidx in zip(user_ids, users, items):
+            if iidx < 0:  # no similarity row for products unseen at training time
+                rejected += 1
+                continue
+            try:
+                if uidx < 0:
+                    uidx = self._user_index(user_id)
+                added = self.interaction_store.add(uidx, iidx)
+            except CapacityError as e:
+                reason = str(e)
+                break
+            if added:
+                accepted += 1
+            else:
+                duplicate += 1
+        result = {
+            "accepted": accepted,
+            "duplicate": duplicate,
+            "rejected": rejected,
+            "throttled": len(events) - accepted - duplicate - rejected,
+            "pending": self.interaction_store.pending,
+        }
+        if reason is not None:
+            result["reason"] = reason
+        return result
@@ -23,11 +23,17 @@ Notes:
 # ----------------------------
 # Imports
 # ----------------------------
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 from scipy.sparse import csr_matrix
 from sklearn.metrics.pairwise import cosine_similarity
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ml.dedup import canonicalise  # noqa: E402
+
 
 # ----------------------------
 # 1) Load data
@@ -42,10 +48,22 @@ users = pd.read_csv("data/processed/users.csv")
 if "user_id" not in reviews.columns or "product_id" not in reviews.columns:
     raise ValueError("reviews.csv must contain 'user_id' and 'product_id' columns.")
 
+# Fold near-duplicate listings onto their canonical product (src/dedup.py), if mapped
+CANONICAL_PATH = "data/processed/product_canonical.csv"
+canonical_map = (
+    pd.read_csv(CANONICAL_PATH, dtype=str)
+    if os.path.exists(CANONICAL_PATH)
+    else pd.DataFrame({"product_id": [], "canonical_id": []}, dtype=str)
+)
+canonical = dict(canonical_map.itertuples(index=False, name=None))
+reviews["product_id"] = canonicalise(reviews["product_id"].astype(str), canonical_map)
+
 # De-duplicate in case there are repeated user→product rows
 interactions = reviews[["user_id", "product_id"]].dropna().drop_duplicates()
 
-print(f"Loaded: {len(products)} products, {len(users)} users, {len(interactions)} interactions.")
+print(
+    f"Loaded: {len(products)} products, {len(users)} users, {len(interactions)} interactions."
+)
 
 
 # ----------------------------
@@ -146,7 +164,7 @@ def similar_items(product_id: str, k: int = 10):
     """
     Return top-K products most similar to the given product_id.
     """
-    pid = str(product_id)
+    pid = canonical.get(str(product_id), str(product_id))
     if pid not in prod2idx:
         print(f"[WARN] Unknown product_id={product_id}")
         return []
@@ -181,28 +199,56 @@ if __name__ == "__main__":
     print(f"\n=== Recommendations for user {sample_user} ===")
     recs = recommend_for_user(sample_user, k=10)
     for r in recs:
-        print(f"- [{r['product_id']}] {r['product_name'][:80]} ... | score={r['score']:.4f}")
+        print(
+            f"- [{r['product_id']}] {r['product_name'][:80]} ... | score={r['score']:.4f}"
+        )
 
     sample_prod = interactions["product_id"].astype(str).iloc[10]
-    print(f"\n=== Items similar to product {sample_prod}: {get_product_name(sample_prod)[:80]} ===")
+    print(
+        f"\n=== Items similar to product {sample_prod}: {get_product_name(sample_prod)[:80]} ==="
+    )
     sims = similar_items(sample_prod, k=10)
     for s in sims:
-        print(f"- [{s['product_id']}] {s['product_name'][:80]} ... | sim={s['similarity']:.4f}")
+        print(
+            f"- [{s['product_id']}] {s['product_name'][:80]} ... | sim={s['similarity']:.4f}"
+        )
 
     # ----------------------------
     # 9) Save model artifacts
     # ----------------------------
     import joblib
-    import os
+    from ml.encoders import IdEncoder, StringTable, save_id_artifacts
+    from ml.recommenders.filters import FilterIndex
 
     os.makedirs("artifacts", exist_ok=True)
 
     joblib.dump(R, "artifacts/user_item_sparse.pkl")
     joblib.dump(item_item_sim, "artifacts/item_item_sim.pkl")
-    joblib.dump(prod_name_map, "artifacts/prod_name_map.pkl")
-    joblib.dump(idx2prod, "artifacts/idx2prod.pkl")
-    joblib.dump(prod2idx, "artifacts/prod2idx.pkl")
-    joblib.dump(user2idx, "artifacts/user2idx.pkl")
-    joblib.dump(idx2user, "artifacts/idx2user.pkl")
+    canonical_map.to_csv(
+        "artifacts/product_canonical.csv", index=False
+    )  # read by the API
+
+    # ID ↔ index maps as memory-mappable arrays instead of pickled dicts
+    catalog = products.assign(
+        product_id=products["product_id"].astype(str)
+    ).drop_duplicates("product_id")
+    save_id_artifacts(
+        "artifacts",
+        users=IdEncoder.from_ids(idx2user),
+        items=IdEncoder.from_ids(idx2prod),
+        catalog=IdEncoder.from_ids(catalog["product_id"].to_numpy()),
+        product_names=StringTable.from_strings(catalog["product_name"].fillna("")),
+    )
+
+    # Category / price / rating bitmaps over the catalog, for filtered recommendations
+    categories_path = "data/processed/product_categories.csv"
+    FilterIndex.from_products(
+        catalog,
+        (
+            pd.read_csv(categories_path, dtype=str)
+            if os.path.exists(categories_path)
+            else None
+        ),
+    ).save("artifacts/filters.npz")
 
     print("Model artifacts saved in /artifacts directory.")
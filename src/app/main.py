@@ -74,33 +74,68 @@ import time
 #     recs = recommend_for_user(user_id, k)
 #     return recs if recs else {"message": "No recommendations"}
 # from fastapi import FastAPI
-from fastapi import FastAPI
-import joblib
-import numpy as np
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query
+from pydantic import BaseModel, Field
 import os
+import threading
 from prometheus_fastapi_instrumentator import Instrumentator
 
+# Heavy imports (numpy/scipy/joblib/ml.*) and the artifacts live in
+# app/engine.py and are loaded by _load_engine(), never at import time.
 ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "../../artifacts/")
 
-user2idx = joblib.load(os.path.join(ARTIFACT_DIR, "user2idx.pkl"))
-idx2user = joblib.load(os.path.join(ARTIFACT_DIR, "idx2user.pkl"))
-prod2idx = joblib.load(os.path.join(ARTIFACT_DIR, "prod2idx.pkl"))
-idx2prod = joblib.load(os.path.join(ARTIFACT_DIR, "idx2prod.pkl"))
-item_item_sim = joblib.load(os.path.join(ARTIFACT_DIR, "item_item_sim.pkl"))
-prod_name_map = joblib.load(os.path.join(ARTIFACT_DIR, "prod_name_map.pkl"))
-user_item_sparse = joblib.load(os.path.join(ARTIFACT_DIR, "user_item_sparse.pkl"))
+# "background": serve /health/live immediately, load artifacts in a thread
+# "blocking"  : finish loading before the app accepts traffic
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
+
+MAX_K = 100  # upper bound for the `k` query parameter
+MAX_EVENTS = 1000  # events per POST /events request
+
+state = {"engine": None, "status": "not_started", "error": None, "load_seconds": None}
+
+
+def _load_engine():
+    state["status"] = "loading"
+    start = time.time()
+    try:
+        from . import engine
+
+        state["engine"] = engine.RecommenderEngine(ARTIFACT_DIR)
+        state.update(status="ready", load_seconds=round(time.time() - start, 3))
+    except Exception as e:
+        state.update(status="error", error=str(e))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STARTUP_MODE == "blocking":
+        _load_engine()
+    else:
+        threading.Thread(
+            target=_load_engine, name="artifact-loader", daemon=True
+        ).start()
+    yield
+    if state["engine"] is not None:
+        state["engine"].close()
+
 
 # FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Custom metrics
-RECOMMENDATIONS_COUNTER = Counter("recommendations_total", "Total number of recommendations made")
+RECOMMENDATIONS_COUNTER = Counter(
+    "recommendations_total", "Total number of recommendations made"
+)
 RECOMMENDATION_DURATION = Histogram(
     "recommendation_duration_seconds", "Time spent generating recommendations"
 )
 EMPTY_RECOMMENDATIONS = Counter(
     "empty_recommendations_total", "Number of times no recommendations were found"
 )
+EVENTS_INGESTED = Counter(
+    "events_ingested_total", "Interaction events ingested", ["status"]
+)
 
 
 @app.get("/metrics", response_class=PlainTextResponse)
@@ -117,43 +152,59 @@ instrumentator = Instrumentator(
 instrumentator.instrument(app).expose(app, "/metrics")
 
 
-def get_product_name(pid: str) -> str:
-    return prod_name_map.get(str(pid), str(pid))
-
-
-def recommend_for_user(user_id: str, k: int = 10, exclude_seen: bool = True):
+def _engine():
+    engine = state["engine"]
+    if engine is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model artifacts not loaded ({state['status']})",
+            headers={"Retry-After": "1"},
+        )
+    return engine
+
+
+def item_filters(
+    category: list[str] | None = Query(
+        None, description="Any of these categories (repeatable)"
+    ),
+    min_price: float | None = None,
+    max_price: float | None = None,
+    min_rating: float | None = None,
+    min_rating_count: float | None = None,
+) -> dict:
+    """Filter query parameters → FilterIndex.mask() keyword arguments."""
+    return {
+        "categories": category,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_rating": min_rating,
+        "min_rating_count": min_rating_count,
+    }
+
+
+def recommend_for_user(
+    user_id: str, k: int = 10, exclude_seen: bool = True, filters: dict | None = None
+):
     RECOMMENDATIONS_COUNTER.inc()
 
-    if user_id not in user2idx:
+    engine = _engine()
+    try:
+        recs = engine.recommend_for_user(user_id, k, exclude_seen, filters)
+    except engine.FilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if recs is None:
         EMPTY_RECOMMENDATIONS.inc()
         return []
+    return recs
 
-    uidx = user2idx[user_id]
-    user_row = user_item_sparse.getrow(uidx)
-    interacted_items = user_row.indices
-
-    if interacted_items.size == 0:
-        return []
-
-    scores = item_item_sim[:, interacted_items].sum(axis=1)
 
-    if exclude_seen:
-        scores[interacted_items] = -np.inf
+class Event(BaseModel):
+    user_id: str
+    product_id: str
 
-    topk_idx = np.argpartition(scores, -k)[-k:]
-    topk_idx = topk_idx[np.argsort(scores[topk_idx])[::-1]]
 
-    results = []
-    for j in topk_idx:
-        pid = idx2prod[j]
-        results.append(
-            {
-                "product_id": pid,
-                "score": float(scores[j]),
-                "product_name": get_product_name(pid),
-            }
-        )
-    return results
+class EventBatch(BaseModel):
+    events: list[Event] = Field(max_length=MAX_EVENTS)
 
 
 @app.get("/health")
@@ -161,10 +212,56 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/live")
+def liveness():
+    # process is up and serving HTTP; says nothing about the model
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+def readiness():
+    body = {k: v for k, v in state.items() if k != "engine"}
+    if state["engine"] is None:
+        raise HTTPException(status_code=503, detail=body)
+    return body
+
+
+@app.get("/similar/{product_id}")
+def similar(
+    product_id: str,
+    k: int = Query(10, ge=1, le=MAX_K),
+    content_weight: float = Query(0.3, ge=0.0, le=1.0),
+    filters: dict = Depends(item_filters),
+):
+    engine = _engine()
+    try:
+        sims = engine.similar_products(product_id, k, content_weight, filters)
+    except engine.FilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return sims if sims else {"message": "No similar products"}
+
+
+@app.post("/events")
+def ingest_events(batch: EventBatch):
+    result = _engine().ingest((ev.user_id, ev.product_id) for ev in batch.events)
+    for status in ("accepted", "duplicate", "rejected", "throttled"):
+        EVENTS_INGESTED.labels(status).inc(result[status])
+    if result["throttled"]:
+        # events before the first throttled one were recorded; resend the rest later
+        raise HTTPException(
+            status_code=429, detail=result, headers={"Retry-After": "5"}
+        )
+    return result
+
+
 @app.get("/recommend/{user_id}")
-def recommend(user_id: str, k: int = 5):
+def recommend(
+    user_id: str,
+    k: int = Query(5, ge=1, le=MAX_K),
+    filters: dict = Depends(item_filters),
+):
     start_time = time.time()
-    recs = recommend_for_user(user_id, k)
+    recs = recommend_for_user(user_id, k, filters=filters)
     duration = time.time() - start_time
     RECOMMENDATION_DURATION.observe(duration)
     return recs if recs else {"message": "No recommendations"}
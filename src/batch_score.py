@@ -0,0 +1,230 @@
+# project/src/batch_score.py
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ml.encoders import load_id_artifacts
+from ml.recommenders.batch import topk_for_rows
+
+# Per-worker artifacts, loaded once by _init_worker()
+_R = None
+_SIM = None
+_USERS = None
+_ITEMS = None
+
+
+def _init_worker(artifact_dir: str):
+    global _R, _SIM, _USERS, _ITEMS
+    art = Path(artifact_dir)
+    _R = joblib.load(art / "user_item_sparse.pkl").tocsr()
+    # mmap the dense similarity so all workers share the same page cache
+    _SIM = joblib.load(art / "item_item_sim.pkl", mmap_mode="r")
+    _USERS, _ITEMS, _, _ = load_id_artifacts(art)  # memory-mapped encoders
+
+
+# Files the workers read; a resume only reuses parts scored against the same ones
+_ARTIFACTS = [
+    "user_item_sparse.pkl",
+    "item_item_sim.pkl",
+    "users.*.npy",
+    "items.*.npy",
+    "idx2user.pkl",
+    "idx2prod.pkl",
+]
+
+
+def _artifact_fingerprint(artifact_dir: str | Path) -> dict:
+    """(size, mtime) of every scoring artifact: cheap, and any rewrite changes it."""
+    art = Path(artifact_dir)
+    files = sorted({p for pattern in _ARTIFACTS for p in art.glob(pattern)})
+    return {p.name: f"{p.stat().st_size}:{p.stat().st_mtime_ns}" for p in files}
+
+
+def _shard_path(out_dir: Path, shard: int, fmt: str) -> Path:
+    return out_dir / f"part-{shard:05d}.{fmt}"
+
+
+def _score_shard(
+    shard: int, start: int, stop: int, out_dir: str, fmt: str, k: int, batch: int
+):
+    """Score users [start, stop) in blocks of `batch`, streaming rows to one shard file."""
+    out_dir = Path(out_dir)
+    final = _shard_path(out_dir, shard, fmt)
+    tmp = final.with_name(f".{final.name}.tmp")
+
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    pq_writer = None
+    n_users = n_rows = 0
+    with open(tmp, "wb") as fh:
+        for lo in range(start, stop, batch):
+            hi = min(lo + batch, stop)
+            rows = _R[lo:hi]
+            top, top_scores = topk_for_rows(rows, _SIM, k=k, exclude_seen=True)
+
+            # users without interactions get nothing (same as recommend_for_user)
+            active = np.diff(rows.indptr) > 0
+            valid = np.isfinite(top_scores) & active[:, None]
+            uu, rr = np.nonzero(valid)
+            if uu.size == 0:
+                continue
+
+            df = pd.DataFrame(
+                {
+                    "user_id": _USERS.decode(lo + uu),
+                    "rank": (rr + 1).astype(np.int16),
+                    "product_id": _ITEMS.decode(top[uu, rr]),
+                    "score": top_scores[uu, rr],
+                }
+            )
+            n_users += int(active.sum())
+            n_rows += len(df)
+
+            if fmt == "csv":
+                df.to_csv(fh, header=n_rows == len(df), index=False)
+            else:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if pq_writer is None:
+                    pq_writer = pq.ParquetWriter(fh, table.schema)
+                pq_writer.write_table(table)
+
+        if pq_writer is not None:
+            pq_writer.close()
+
+    os.replace(tmp, final)  # a shard only "exists" once fully written
+    return shard, n_users, n_rows
+
+
+def _prepare_out_dir(out_dir: Path, manifest: dict, resume: bool):
+    """
+    Resume only into parts written with the same layout; otherwise clear every
+    part file first so stale shards from another layout can't be mixed in.
+    Parts scored against other artifacts (manifest["artifacts"]) are cleared
+    and rescored.
+    """
+    manifest_path = out_dir / "_manifest.json"
+    parts = [*out_dir.glob("part-*"), *out_dir.glob(".part-*.tmp")]
+    if resume and parts:
+        previous = (
+            json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest_path.exists()
+            else None
+        )
+
+        def layout(m):
+            return m and {k: v for k, v in m.items() if k != "artifacts"}
+
+        if layout(previous) != layout(manifest):
+            sys.exit(
+                f"{out_dir} holds parts written with {layout(previous)}; "
+                "use --no-resume or a new --out-dir"
+            )
+        if previous.get("artifacts") != manifest.get("artifacts"):
+            print(
+                f"artifacts changed since {out_dir} was scored: rescoring every shard"
+            )
+            resume = False
+    if not resume:
+        for part in parts:
+            part.unlink()
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(
+        description="Bulk-score every user into sharded recommendation files"
+    )
+    ap.add_argument(
+        "--artifact-dir", default="artifacts", help="Folder with the model .pkl files"
+    )
+    ap.add_argument(
+        "--out-dir", default="data/processed/recs", help="Folder for output shards"
+    )
+    ap.add_argument("--k", type=int, default=10, help="Recommendations per user")
+    ap.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    ap.add_argument(
+        "--shard-size", type=int, default=10_000, help="Users per output shard"
+    )
+    ap.add_argument(
+        "--batch-size", type=int, default=512, help="Users per scoring block"
+    )
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument(
+        "--no-resume", action="store_true", help="Re-score shards that already exist"
+    )
+    args = ap.parse_args(argv)
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    n_users = joblib.load(Path(args.artifact_dir) / "user_item_sparse.pkl").shape[0]
+    shards = [
+        (s, lo, min(lo + args.shard_size, n_users))
+        for s, lo in enumerate(range(0, n_users, args.shard_size))
+    ]
+
+    # Shard boundaries must match for resume to be safe
+    manifest = {
+        "n_users": n_users,
+        "k": args.k,
+        "shard_size": args.shard_size,
+        "format": args.format,
+        "artifacts": _artifact_fingerprint(args.artifact_dir),
+    }
+    _prepare_out_dir(out_dir, manifest, resume=not args.no_resume)
+
+    todo = [
+        s
+        for s in shards
+        if args.no_resume or not _shard_path(out_dir, s[0], args.format).exists()
+    ]
+    print(
+        f"{len(shards)} shards, {len(shards) - len(todo)} already done, {len(todo)} to score"
+    )
+
+    t0 = time.time()
+    done_users = 0
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(args.artifact_dir,),
+    ) as pool:
+        futures = [
+            pool.submit(
+                _score_shard,
+                s,
+                lo,
+                hi,
+                str(out_dir),
+                args.format,
+                args.k,
+                args.batch_size,
+            )
+            for s, lo, hi in todo
+        ]
+        for i, fut in enumerate(as_completed(futures), start=1):
+            shard, users, rows = fut.result()
+            done_users += users
+            elapsed = time.time() - t0
+            print(
+                f"[{i}/{len(todo)}] shard {shard:05d}: {users} users, {rows} rows "
+                f"| {done_users / max(elapsed, 1e-9):.0f} users/s"
+            )
+
+    print(f"Done in {time.time() - t0:.1f}s → {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
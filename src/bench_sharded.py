@@ -0,0 +1,146 @@
+# project/src/bench_sharded.py
+
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from ml.recommenders.batch import topk_for_rows
+from ml.recommenders.sharded import (
+    ShardedScorer,
+    load_similarity,
+    partition_items,
+    serve_shard,
+)
+
+
+def _synthetic(n_items: int, out: Path, seed: int = 0) -> Path:
+    """Dense symmetric similarity, written as .npy so shards can mmap it."""
+    rng = np.random.default_rng(seed)
+    sim = np.lib.format.open_memmap(
+        out, mode="w+", dtype=np.float32, shape=(n_items, n_items)
+    )
+    for lo in range(0, n_items, 1024):
+        sim[lo : lo + 1024] = rng.random(
+            (min(1024, n_items - lo), n_items), dtype=np.float32
+        )
+    sim[:] = (sim + sim.T) / 2  # fine for benchmark sizes
+    sim.flush()
+    return out
+
+
+def _users(n_users: int, n_items: int, per_user: int, seed: int = 1) -> csr_matrix:
+    rng = np.random.default_rng(seed)
+    cols = rng.integers(0, n_items, size=(n_users, per_user)).ravel()
+    rows = np.repeat(np.arange(n_users), per_user)
+    R = csr_matrix(
+        (np.ones(cols.size, dtype=np.float32), (rows, cols)), shape=(n_users, n_items)
+    )
+    R.data[:] = 1.0
+    return R
+
+
+def _socket_shards(sim_path: str, n_shards: int, sock_dir: str):
+    ctx = mp.get_context("spawn")
+    n_items = load_similarity(sim_path).shape[0]
+    addresses, procs = [], []
+    for s, (lo, hi) in enumerate(partition_items(n_items, n_shards)):
+        address = os.path.join(sock_dir, f"{n_shards}x-shard-{s}.sock")
+        p = ctx.Process(
+            target=serve_shard, args=(address, sim_path, lo, hi), daemon=True
+        )
+        p.start()
+        addresses.append(address)
+        procs.append(p)
+    while not all(os.path.exists(a) for a in addresses):
+        time.sleep(0.05)
+    return ShardedScorer.connect(addresses), procs
+
+
+def _run(topk, R: csr_matrix, k: int, batch: int, single: int):
+    t0 = time.perf_counter()
+    for lo in range(0, R.shape[0], batch):
+        topk(R[lo : lo + batch], k)
+    throughput = R.shape[0] / (time.perf_counter() - t0)
+
+    lat = []
+    for u in range(min(single, R.shape[0])):
+        t = time.perf_counter()
+        topk(R[u : u + 1], k)
+        lat.append(time.perf_counter() - t)
+    lat_ms = np.array(lat) * 1000
+    return throughput, np.percentile(lat_ms, 50), np.percentile(lat_ms, 99)
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Throughput of item-partitioned scoring vs shard count"
+    )
+    ap.add_argument(
+        "--sim", default="artifacts/item_item_sim.pkl", help="Similarity .pkl/.npy"
+    )
+    ap.add_argument(
+        "--n-items", type=int, default=0, help="Use a synthetic catalog of this size"
+    )
+    ap.add_argument("--shards", default="1,2,4", help="Comma-separated shard counts")
+    ap.add_argument("--transport", choices=["pipe", "socket"], default="pipe")
+    ap.add_argument("--users", type=int, default=5_000, help="Users scored per run")
+    ap.add_argument(
+        "--per-user", type=int, default=5, help="Seen items per synthetic user"
+    )
+    ap.add_argument(
+        "--batch-size", type=int, default=256, help="Users per scatter-gather call"
+    )
+    ap.add_argument(
+        "--single", type=int, default=200, help="Single-user calls for latency"
+    )
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sim_path = args.sim
+        if args.n_items:
+            sim_path = str(_synthetic(args.n_items, Path(tmp) / "sim.npy"))
+        sim = load_similarity(sim_path)
+        n_items = sim.shape[0]
+        R = _users(args.users, n_items, args.per_user)
+        print(
+            f"{n_items} items, {R.shape[0]} users, {os.cpu_count()} CPUs, {args.transport}"
+        )
+        print(f"{'shards':>8} {'users/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+
+        rate, p50, p99 = _run(
+            lambda r, k: topk_for_rows(r, sim, k),
+            R,
+            args.k,
+            args.batch_size,
+            args.single,
+        )
+        print(f"{'local':>8} {rate:>10.0f} {p50:>8.2f} {p99:>8.2f}")
+
+        for n in (int(s) for s in args.shards.split(",")):
+            procs = []
+            if args.transport == "socket":
+                scorer, procs = _socket_shards(sim_path, n, tmp)
+            else:
+                scorer = ShardedScorer.spawn(sim_path, n)
+            try:
+                scorer.topk(R[:1], args.k)  # warm up
+                rate, p50, p99 = _run(
+                    scorer.topk, R, args.k, args.batch_size, args.single
+                )
+            finally:
+                scorer.close()
+                for p in procs:
+                    p.terminate()
+            print(f"{n:>8} {rate:>10.0f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+# project/src/build_artifacts.py
+
+"""
+Incremental build of everything the APIs load from artifacts/.
+
+    dedup_products ─► interactions ─► cooccurrence ─► similarity  (reviews: user_id, product_id)
+    dedup_reviews ──► sentiment                                   (reviews text + product rating)
+    catalog                                                       (products: id, name)
+    filters                                                       (products: category/price/rating)
+    content                                                       (products: id, name, about_product)
+
+dedup_products (name, about_product; same sizes and list price) maps
+near-duplicate listings onto one canonical product ID before R is built; dedup_reviews (title, content)
+drops copy-pasted reviews from the sentiment training set.
+
+Each stage is keyed on the CSV columns it reads plus its config (see
+ml/pipeline.py), so e.g. editing product names rebuilds catalog/content
+(and dedup_products, whose unchanged mapping leaves R alone), and new reviews
+recompute only the co-occurrence slabs they touch.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csr_matrix
+
+from ml.encoders import IdEncoder, StringTable
+from ml.pipeline import Input, Stage, StageContext, Store, run_pipeline
+
+
+MINHASH = {
+    "num_perm": 128,
+    "bands": 32,
+    "threshold": 0.9,
+    "k": 5,
+}  # shared by both dedup stages
+# listings only merge when sizes/capacities in the name and the list price agree
+PRODUCT_MATCH = ["product_name", "actual_price"]
+
+
+# ----------------------------
+# Stages
+# ----------------------------
+def _dedup_chunks(path: str, columns: list[str], chunksize: int):
+    return pd.read_csv(path, usecols=columns, dtype=str, chunksize=chunksize)
+
+
+def _find_duplicates(
+    ctx: StageContext,
+    id_col: str,
+    text_cols: list[str],
+    priority_col=None,
+    match_cols: list[str] | None = None,
+):
+    from ml.dedup import find_duplicates
+
+    c = ctx.config
+    columns = [id_col, *text_cols] + ([priority_col] if priority_col else [])
+    columns += [col for col in match_cols or [] if col not in columns]
+    return find_duplicates(
+        _dedup_chunks(ctx.inputs["data"], columns, c["chunksize"]),
+        id_col,
+        text_cols,
+        priority_col=priority_col,
+        match_cols=match_cols,
+        num_perm=c["num_perm"],
+        bands=c["bands"],
+        threshold=c["threshold"],
+        k=c["k"],
+    )
+
+
+def build_dedup_products(ctx: StageContext):
+    mapping = _find_duplicates(
+        ctx,
+        "product_id",
+        ["product_name", "about_product"],
+        priority_col="rating_count",
+        match_cols=PRODUCT_MATCH,
+    )
+    print(f"  dedup_products: {len(mapping)} duplicate listings")
+    mapping.to_csv(ctx.out / "product_canonical.csv", index=False)
+
+
+def build_dedup_reviews(ctx: StageContext):
+    mapping = _find_duplicates(ctx, "review_id", ["review_title", "review_content"])
+    print(f"  dedup_reviews: {len(mapping)} duplicate reviews")
+    mapping.to_csv(ctx.out / "review_duplicates.csv", index=False)
+
+
+def build_interactions(ctx: StageContext):
+    from ml.dedup import canonicalise
+
+    reviews = pd.read_csv(
+        ctx.inputs["reviews"], usecols=["user_id", "product_id"], dtype=str
+    )
+    mapping = pd.read_csv(
+        ctx.deps["dedup_products"] / "product_canonical.csv", dtype=str
+    )
+    reviews["product_id"] = canonicalise(reviews["product_id"], mapping)
+    interactions = reviews.dropna().drop_duplicates()
+    users = IdEncoder.from_ids(interactions["user_id"].unique())
+    items = IdEncoder.from_ids(interactions["product_id"].unique())
+    R = csr_matrix(
+        (
+            np.ones(len(interactions), dtype=np.float32),
+            (
+                users.encode(interactions["user_id"].to_numpy()),
+                items.encode(interactions["product_id"].to_numpy()),
+            ),
+        ),
+        shape=(len(users), len(items)),
+    )
+    users.save(ctx.out / "users")
+    items.save(ctx.out / "items")
+    joblib.dump(R, ctx.out / "user_item_sparse.pkl")
+
+
+def build_cooccurrence(ctx: StageContext):
+    from ml.recommenders.cooccurrence import cooccurrence
+
+    R = joblib.load(ctx.deps["interactions"] / "user_item_sparse.pkl")
+    C, stats = cooccurrence(
+        R, block_size=ctx.config["block_size"], cache_dir=ctx.blobs / "cooccurrence"
+    )
+    print(f"  cooccurrence: reused {stats['reused']}/{stats['slabs']} slabs")
+    ctx.record_blobs(stats["paths"])
+    sparse.save_npz(ctx.out / "cooccurrence.npz", C)
+
+
+def build_similarity(ctx: StageContext):
+    from ml.recommenders.cooccurrence import cosine_from_cooccurrence
+
+    C = sparse.load_npz(ctx.deps["cooccurrence"] / "cooccurrence.npz")
+    joblib.dump(cosine_from_cooccurrence(C), ctx.out / "item_item_sim.pkl")
+
+
+def _catalog(path: str, columns: list[str]) -> pd.DataFrame:
+    return pd.read_csv(path, usecols=columns, dtype=str).drop_duplicates("product_id")
+
+
+def build_catalog(ctx: StageContext):
+    catalog = _catalog(ctx.inputs["products"], ["product_id", "product_name"])
+    IdEncoder.from_ids(catalog["product_id"].to_numpy()).save(ctx.out / "catalog")
+    StringTable.from_strings(catalog["product_name"].fillna("")).save(
+        ctx.out / "product_names"
+    )
+
+
+def build_filters(ctx: StageContext):
+    from ml.recommenders.filters import FilterIndex
+
+    columns = ["product_id", "category", "discounted_price", "rating", "rating_count"]
+    catalog = _catalog(ctx.inputs["products"], columns)
+    categories = pd.read_csv(ctx.inputs["categories"], dtype=str)
+    FilterIndex.from_products(catalog, categories).save(ctx.out / "filters.npz")
+
+
+def build_content(ctx: StageContext):
+    from ml.recommenders.content import build_content_neighbours
+    from ml.recommenders.neighbours import save_neighbours
+
+    products = _catalog(
+        ctx.inputs["products"], ["product_id", "product_name", "about_product"]
+    )
+    nn = build_content_neighbours(
+        products,
+        n=ctx.config["n"],
+        max_df=ctx.config["max_df"],
+        block_size=ctx.config["block_size"],
+        n_jobs=ctx.config["n_jobs"],
+    )
+    save_neighbours(
+        ctx.out / "content_neighbours.npz", nn, products["product_id"].to_numpy()
+    )
+
+
+def build_sentiment(ctx: StageContext):
+    from ml.sentiment.model import SentimentModel, review_text, weak_labels
+
+    reviews = pd.read_csv(
+        ctx.inputs["reviews"], dtype={"product_id": str, "review_id": str}
+    )
+    copies = pd.read_csv(
+        ctx.deps["dedup_reviews"] / "review_duplicates.csv", dtype=str
+    )["review_id"]
+    reviews = reviews[~reviews["review_id"].isin(copies)].drop_duplicates("review_id")
+    products = pd.read_csv(ctx.inputs["products"], dtype={"product_id": str})
+    df = weak_labels(reviews, products, pos=ctx.config["pos"], neg=ctx.config["neg"])
+    model = SentimentModel(n_features=ctx.config["n_features"], C=ctx.config["C"])
+    model.fit(review_text(df).tolist(), df["label"].to_numpy()).save(
+        ctx.out / "sentiment.joblib"
+    )
+
+
+def stages(data_dir: str | Path, n_jobs: int = -1) -> list[Stage]:
+    """`n_jobs`: processes inside the content stage (1 when stages already run in parallel)."""
+    d = Path(data_dir)
+    reviews, products = str(d / "reviews.csv"), str(d / "products.csv")
+    return [
+        Stage(
+            "dedup_products",
+            build_dedup_products,
+            inputs={
+                "data": Input(
+                    products,
+                    [
+                        "product_id",
+                        "product_name",
+                        "about_product",
+                        "rating_count",
+                        "actual_price",
+                    ],
+                )
+            },
+            config={**MINHASH, "match": PRODUCT_MATCH},
+            options={"chunksize": 100_000},
+        ),
+        Stage(
+            "dedup_reviews",
+            build_dedup_reviews,
+            inputs={
+                "data": Input(reviews, ["review_id", "review_title", "review_content"])
+            },
+            config=MINHASH,
+            options={"chunksize": 100_000},
+        ),
+        Stage(
+            "interactions",
+            build_interactions,
+            inputs={"reviews": Input(reviews, ["user_id", "product_id"])},
+            deps=["dedup_products"],
+        ),
+        Stage(
+            "cooccurrence",
+            build_cooccurrence,
+            deps=["interactions"],
+            config={"block_size": 256},
+        ),
+        Stage("similarity", build_similarity, deps=["cooccurrence"]),
+        Stage(
+            "catalog",
+            build_catalog,
+            inputs={"products": Input(products, ["product_id", "product_name"])},
+        ),
+        Stage(
+            "filters",
+            build_filters,
+            inputs={
+                "products": Input(
+                    products,
+                    [
+                        "product_id",
+                        "category",
+                        "discounted_price",
+                        "rating",
+                        "rating_count",
+                    ],
+                ),
+                "categories": Input(str(d / "product_categories.csv")),
+            },
+        ),
+        Stage(
+            "content",
+            build_content,
+            inputs={
+                "products": Input(
+                    products, ["product_id", "product_name", "about_product"]
+                )
+            },
+            config={"n": 50, "max_df": 0.2, "block_size": 256},
+            options={"n_jobs": n_jobs},
+        ),
+        Stage(
+            "sentiment",
+            build_sentiment,
+            inputs={
+                "reviews": Input(
+                    reviews,
+                    ["product_id", "review_id", "review_title", "review_content"],
+                ),
+                "products": Input(products, ["product_id", "rating"]),
+            },
+            deps=["dedup_reviews"],
+            config={"pos": 4.2, "neg": 3.9, "n_features": 2**20, "C": 4.0},
+        ),
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Incrementally build the serving artifacts"
+    )
+    ap.add_argument(
+        "--data-dir", default="data/processed", help="Folder with the processed CSVs"
+    )
+    ap.add_argument("--out-dir", default="artifacts")
+    ap.add_argument(
+        "--store", default=".cache/build", help="Content-addressed build cache"
+    )
+    ap.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Stages run at once"
+    )
+    names = [s.name for s in stages(".")]
+    ap.add_argument(
+        "--only",
+        nargs="*",
+        choices=names,
+        help="Build just these stages (and what they need)",
+    )
+    ap.add_argument(
+        "--force",
+        nargs="*",
+        choices=names,
+        default=[],
+        help="Rebuild these stages regardless",
+    )
+    ap.add_argument(
+        "--gc", action="store_true", help="Drop cached stage outputs not used now"
+    )
+    args = ap.parse_args()
+
+    # joblib pools don't shut down cleanly inside the stage worker processes
+    todo = stages(args.data_dir, n_jobs=-1 if args.jobs == 1 else 1)
+    if args.only:
+        by_name, wanted = {s.name: s for s in todo}, set()
+        stack = list(args.only)
+        while stack:
+            name = stack.pop()
+            if name not in wanted:
+                wanted.add(name)
+                stack.extend(by_name[name].deps)
+        todo = [s for s in todo if s.name in wanted]
+
+    store = Store(args.store)
+    t0 = time.time()
+    results = run_pipeline(
+        todo, args.out_dir, store, jobs=args.jobs, force=set(args.force)
+    )
+    built = sum(not r.cached for r in results)
+    print(
+        f"{built} built, {len(results) - built} cached in {time.time() - t0:.1f}s → {args.out_dir}"
+    )
+    if args.gc:
+        # with --only, stages that didn't run keep their cached outputs
+        ran = {s.name for s in todo} if args.only else None
+        objects, blobs = store.gc({r.key for r in results}, stages=ran)
+        print(f"gc: removed {objects} stale stage outputs, {blobs} unreferenced blobs")
+
+
+if __name__ == "__main__":
+    main()
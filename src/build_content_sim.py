@@ -0,0 +1,55 @@
+# project/src/build_content_sim.py
+
+from __future__ import annotations
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from ml.recommenders.content import build_content_neighbours
+from ml.recommenders.neighbours import save_neighbours
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Build top-N content neighbours from product text"
+    )
+    ap.add_argument(
+        "--data-dir", default="data/processed", help="Folder with products.csv"
+    )
+    ap.add_argument("--out", default="artifacts/content_neighbours.npz")
+    ap.add_argument("--n", type=int, default=50, help="Neighbours kept per product")
+    ap.add_argument(
+        "--block-size", type=int, default=256, help="Products per similarity block"
+    )
+    ap.add_argument(
+        "--n-jobs", type=int, default=-1, help="Worker processes (-1 = all cores)"
+    )
+    ap.add_argument(
+        "--max-df", type=float, default=0.2, help="Drop terms in more than this share"
+    )
+    args = ap.parse_args()
+
+    products = pd.read_csv(
+        Path(args.data_dir) / "products.csv",
+        usecols=["product_id", "product_name", "about_product"],
+        dtype=str,
+    ).drop_duplicates("product_id")
+
+    t0 = time.time()
+    nn = build_content_neighbours(
+        products,
+        n=args.n,
+        block_size=args.block_size,
+        n_jobs=args.n_jobs,
+        max_df=args.max_df,
+    )
+    save_neighbours(args.out, nn, products["product_id"].to_numpy())
+    print(
+        f"{nn.shape[0]} products, {nn.nnz} neighbour pairs in {time.time() - t0:.1f}s → {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
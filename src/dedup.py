@@ -0,0 +1,87 @@
+# project/src/dedup.py
+
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from ml.dedup import find_duplicates
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Map near-duplicate products and reviews onto canonical IDs (MinHash-LSH)"
+    )
+    ap.add_argument(
+        "--data-dir", default="data/processed", help="Folder with the cleaned CSVs"
+    )
+    ap.add_argument("--out-dir", default="data/processed")
+    ap.add_argument(
+        "--chunksize", type=int, default=100_000, help="Rows read per chunk"
+    )
+    ap.add_argument("--num-perm", type=int, default=128, help="MinHash permutations")
+    ap.add_argument(
+        "--bands", type=int, default=32, help="LSH bands (divides --num-perm)"
+    )
+    ap.add_argument(
+        "--threshold", type=float, default=0.9, help="Min estimated Jaccard"
+    )
+    ap.add_argument("--k", type=int, default=5, help="Characters per shingle")
+    ap.add_argument(
+        "--memmap",
+        action="store_true",
+        help="Keep signatures on disk (very large inputs)",
+    )
+    args = ap.parse_args()
+
+    data, out = Path(args.data_dir), Path(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    params = dict(
+        num_perm=args.num_perm, bands=args.bands, threshold=args.threshold, k=args.k
+    )
+    jobs = [
+        (
+            "products.csv",
+            "product_canonical.csv",
+            "product_id",
+            ["product_name", "about_product"],
+            "rating_count",
+            ["product_name", "actual_price"],  # sizes and list price must agree
+        ),
+        (
+            "reviews.csv",
+            "review_duplicates.csv",
+            "review_id",
+            ["review_title", "review_content"],
+            None,
+            None,
+        ),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for src, dst, id_col, text_cols, priority, match in jobs:
+            t0 = time.time()
+            columns = [id_col, *text_cols] + ([priority] if priority else [])
+            columns += [col for col in match or [] if col not in columns]
+            chunks = pd.read_csv(
+                data / src, usecols=columns, dtype=str, chunksize=args.chunksize
+            )
+            mapping = find_duplicates(
+                chunks,
+                id_col,
+                text_cols,
+                priority_col=priority,
+                match_cols=match,
+                sig_path=Path(tmp) / f"{src}.sig" if args.memmap else None,
+                **params,
+            )
+            mapping.to_csv(out / dst, index=False)
+            print(
+                f"{src}: {len(mapping)} near-duplicates in {time.time() - t0:.1f}s → {out / dst}"
+            )
+
+
+if __name__ == "__main__":
+    main()
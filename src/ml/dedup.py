@@ -0,0 +1,303 @@
+# project/src/ml/dedup.py
+
+"""
+Near-duplicate detection with MinHash + LSH, used to fold duplicate
+product listings (and copy-pasted reviews) onto one canonical ID.
+
+    text ─► character k-shingles ─► MinHash signature (num_perm × uint32)
+         ─► LSH: `bands` keys per row, rows sharing a key are candidates
+         ─► candidates whose signature agreement ≥ threshold are duplicates
+         ─► connected components ─► canonical ID per group
+
+Everything runs on NumPy arrays a batch of rows at a time, so inputs are
+streamed (pd.read_csv chunks) and only the signatures — num_perm · 4 bytes
+per row, optionally a memmap — are kept. Candidate generation sorts the
+band keys instead of comparing rows, and pairs each bucket member with the
+bucket's first row only, so huge buckets stay linear.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+EMPTY = np.uint32(0xFFFFFFFF)  # signature value of rows without text; never matched
+_BATCH_CELLS = 1 << 22  # shingles × num_perm evaluated at once (~32 MB of uint64)
+
+
+def _mix64(z: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser: spreads k-byte shingles over all 64 bits."""
+    z = z + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def normalise(texts: Iterable[str]) -> pd.Series:
+    """Lowercase, punctuation → space, collapse whitespace; NaN → ""."""
+    s = pd.Series(texts, dtype=object).fillna("").astype(str).str.lower()
+    return s.str.replace(r"[\W_]+", " ", regex=True).str.strip()
+
+
+def shingle_hashes(texts: Iterable[str], k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    64-bit hashes of the k-byte shingles of each (already normalised) text.
+    Returns (hashes, offsets): text i owns hashes[offsets[i]:offsets[i + 1]].
+    Texts shorter than k are padded so every text has at least one shingle.
+    """
+    if not 1 <= k <= 8:
+        raise ValueError("k must be between 1 and 8 bytes")
+    encoded = (
+        pd.Series(texts, dtype=object).str.pad(k, side="right").str.encode("utf-8")
+    )
+    lengths = encoded.str.len().to_numpy(dtype=np.int64)
+    buf = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    # pack each k-byte window into one integer: exact, so no collisions before mixing
+    windows = np.lib.stride_tricks.sliding_window_view(buf, k)
+    packed = np.zeros(len(windows), dtype=np.uint64)
+    for j in range(k):
+        packed |= windows[:, j].astype(np.uint64) << np.uint64(8 * j)
+
+    # keep windows that start and end inside one text
+    n_shingles = lengths - k + 1
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    offsets = np.concatenate([[0], np.cumsum(n_shingles)])
+    keep = np.repeat(starts - offsets[:-1], n_shingles) + np.arange(offsets[-1])
+    return _mix64(packed[keep]), offsets
+
+
+def _permutations(num_perm: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(
+        1
+    )  # odd multipliers
+    b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash(
+    texts: Iterable[str],
+    num_perm: int = 64,
+    k: int = 5,
+    seed: int = 0,
+    normalised: bool = False,
+) -> np.ndarray:
+    """
+    MinHash signatures (len(texts) × num_perm, uint32). Permutation i is the
+    multiply-shift hash (a_i·x + b_i mod 2⁶⁴) >> 32 of each shingle hash x.
+    Rows with empty text get the EMPTY signature.
+    """
+    texts = pd.Series(texts, dtype=object) if normalised else normalise(texts)
+    if len(texts) == 0:
+        return np.empty((0, num_perm), dtype=np.uint32)
+    empty = (texts.str.len() == 0).to_numpy()
+    hashes, offsets = shingle_hashes(texts, k)
+    a, b = _permutations(num_perm, seed)
+
+    sig = np.empty((len(texts), num_perm), dtype=np.uint32)
+    per_batch = max(1, _BATCH_CELLS // num_perm)
+    lo = 0
+    while lo < len(texts):
+        # as many rows as fit in the batch budget (at least one)
+        hi = max(
+            lo + 1, int(np.searchsorted(offsets, offsets[lo] + per_batch, "right")) - 1
+        )
+        hi = min(hi, len(texts))
+        # permutations × shingles, so the per-text minimum runs over contiguous memory;
+        # min of the full 64-bit value then >> 32 equals min of the shifted values
+        h = np.multiply.outer(a, hashes[offsets[lo] : offsets[hi]])
+        h += b[:, None]
+        low = np.minimum.reduceat(h, offsets[lo:hi] - offsets[lo], axis=1)
+        sig[lo:hi] = (low >> np.uint64(32)).T
+        lo = hi
+    sig[empty] = EMPTY
+    return sig
+
+
+def minhash_stream(
+    chunks: Iterable[pd.Series],
+    num_perm: int = 64,
+    k: int = 5,
+    seed: int = 0,
+    out: str | Path | None = None,
+) -> np.ndarray:
+    """
+    Signatures for a stream of text chunks (e.g. pd.read_csv(chunksize=...)).
+    With `out`, they are appended to a raw file and returned as a read-only memmap.
+    """
+    if out is None:
+        parts = [minhash(chunk, num_perm, k, seed) for chunk in chunks]
+        return (
+            np.concatenate(parts) if parts else np.empty((0, num_perm), dtype=np.uint32)
+        )
+    n = 0
+    with open(out, "wb") as fh:
+        for chunk in chunks:
+            sig = minhash(chunk, num_perm, k, seed)
+            sig.tofile(fh)
+            n += len(sig)
+    if n == 0:
+        return np.empty((0, num_perm), dtype=np.uint32)
+    return np.memmap(out, dtype=np.uint32, mode="r", shape=(n, num_perm))
+
+
+def lsh_candidates(sig: np.ndarray, bands: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Candidate pairs (i < j) that agree on all rows of at least one band.
+    A pair is found with probability 1 − (1 − s^r)^bands for Jaccard s,
+    r = num_perm / bands.
+    """
+    n, num_perm = sig.shape
+    if num_perm % bands:
+        raise ValueError(f"num_perm={num_perm} is not a multiple of bands={bands}")
+    r = num_perm // bands
+    live = np.flatnonzero((sig != EMPTY).any(axis=1))
+    # pair codes i * n + j; merged whenever the pending ones outgrow max(n, merged)
+    pairs, pending = np.empty(0, dtype=np.int64), []
+    for band in range(bands):
+        cols = sig[live, band * r : (band + 1) * r].astype(np.uint64)
+        key = np.full(len(live), np.uint64(band))
+        for c in range(r):
+            key = _mix64(key ^ cols[:, c])
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        new_bucket = np.concatenate([[True], key[1:] != key[:-1]])
+        leader = order[
+            np.maximum.accumulate(np.where(new_bucket, np.arange(len(key)), 0))
+        ]
+        member = ~new_bucket
+        i, j = live[leader[member]], live[order[member]]
+        pending.append(np.minimum(i, j).astype(np.int64) * n + np.maximum(i, j))
+        if sum(map(len, pending)) > max(n, len(pairs)) or band == bands - 1:
+            pairs = np.unique(np.concatenate([pairs, *pending]))
+            pending = []
+    return pairs // n, pairs % n
+
+
+def near_duplicates(
+    sig: np.ndarray, bands: int = 16, threshold: float = 0.8, block: int = 1 << 16
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """LSH candidates confirmed by signature agreement ≥ threshold: (i, j, similarity)."""
+    i, j = lsh_candidates(sig, bands)
+    sim = np.empty(len(i), dtype=np.float32)
+    for lo in range(0, len(i), block):
+        sl = slice(lo, lo + block)
+        sim[sl] = (sig[i[sl]] == sig[j[sl]]).mean(axis=1)
+    keep = sim >= threshold
+    return i[keep], j[keep], sim[keep]
+
+
+def group_labels(n: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Connected-component label of each row given duplicate pairs."""
+    graph = coo_matrix((np.ones(len(i), dtype=np.int8), (i, j)), shape=(n, n))
+    return connected_components(graph, directed=False)[1]
+
+
+def canonical_ids(
+    ids: np.ndarray, labels: np.ndarray, priority: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Canonical ID per row: within each group, the row with the highest
+    `priority` (e.g. rating_count), ties broken by first occurrence.
+    """
+    ids = np.asarray(ids)
+    n = len(ids)
+    prio = (
+        np.zeros(n)
+        if priority is None
+        else np.nan_to_num(np.asarray(priority, float), nan=-1)
+    )
+    order = np.lexsort((np.arange(n), -prio, labels))  # by group, best first
+    first = np.concatenate([[True], labels[order][1:] != labels[order][:-1]])
+    best = np.empty(labels.max() + 1 if n else 0, dtype=np.int64)
+    best[labels[order][first]] = order[first]
+    return ids[best[labels]]
+
+
+def _priority(values: pd.Series) -> np.ndarray:
+    """'24,269' / '₹1,099' → float; unparsable → NaN."""
+    digits = values.astype(str).str.replace(r"[^\d.\-]", "", regex=True)
+    return pd.to_numeric(digits, errors="coerce").to_numpy(dtype=float)
+
+
+def number_key(values: pd.Series) -> pd.Series:
+    """
+    The numbers in each text as one comparable key: '108 cm (43 inches) 32GB'
+    → '32 43 108', '₹31,999' → '31999'. Sizes, capacities and prices of
+    otherwise identical listings live in these numbers.
+    """
+
+    def canon(n: str) -> str:
+        n = n.replace(",", "")
+        return n.rstrip("0").rstrip(".") if "." in n else n
+
+    nums = values.fillna("").astype(str).str.findall(r"\d+(?:[.,]\d+)*")
+    return nums.map(lambda ns: " ".join(sorted({canon(n) for n in ns})))
+
+
+def find_duplicates(
+    chunks: Iterable[pd.DataFrame],
+    id_col: str,
+    text_cols: list[str],
+    priority_col: str | None = None,
+    match_cols: list[str] | None = None,
+    num_perm: int = 128,
+    bands: int = 32,
+    threshold: float = 0.9,
+    k: int = 5,
+    seed: int = 0,
+    sig_path: str | Path | None = None,
+) -> pd.DataFrame:
+    """
+    Stream DataFrame chunks, MinHash the space-joined `text_cols` of each row
+    and map every near-duplicate row's ID onto its group's canonical ID
+    (highest `priority_col`, then first seen). With `match_cols`, a pair
+    only counts when the numbers in those columns agree (see number_key),
+    so e.g. the 32" and 43" listings of one TV stay apart. Returns only the
+    rows that change: columns [id_col, "canonical_id"].
+    """
+    ids, prio, keys = [], [], []
+
+    def texts():
+        for chunk in chunks:
+            ids.append(chunk[id_col].astype(str).to_numpy())
+            if priority_col is not None:
+                prio.append(_priority(chunk[priority_col]))
+            if match_cols:
+                key = number_key(chunk[match_cols[0]])
+                for col in match_cols[1:]:
+                    key = key + "|" + number_key(chunk[col])
+                keys.append(key.to_numpy(dtype=object))
+            text = chunk[text_cols[0]].fillna("").astype(str)
+            for col in text_cols[1:]:
+                text = text + " " + chunk[col].fillna("").astype(str)
+            yield text
+
+    sig = minhash_stream(texts(), num_perm, k, seed, out=sig_path)
+    if len(sig) == 0:
+        return pd.DataFrame({id_col: [], "canonical_id": []}, dtype=str)
+    i, j, _ = near_duplicates(sig, bands, threshold)
+    if keys:
+        keys = np.concatenate(keys)
+        same = keys[i] == keys[j]
+        i, j = i[same], j[same]
+    ids = np.concatenate(ids)
+    canon = canonical_ids(
+        ids, group_labels(len(ids), i, j), np.concatenate(prio) if prio else None
+    )
+    changed = ids != canon
+    out = pd.DataFrame({id_col: ids[changed], "canonical_id": canon[changed]})
+    return out.drop_duplicates(id_col).reset_index(drop=True)
+
+
+def canonicalise(ids: pd.Series, mapping: pd.DataFrame) -> pd.Series:
+    """Replace IDs by their canonical ID (mapping as returned by find_duplicates)."""
+    if mapping.empty:
+        return ids
+    canon = mapping.set_index(mapping.columns[0])["canonical_id"]
+    return ids.map(canon).fillna(ids)
@@ -0,0 +1,233 @@
+# project/src/ml/encoders.py
+
+"""
+Compact, memory-mappable replacements for the ID dicts / object arrays.
+
+IdEncoder   : string ID ↔ dense index. IDs are stored once, sorted, as a
+              fixed-width UTF-8 byte array with the two int permutations, so
+              encode is a vectorised binary search and decode a gather.
+StringTable : variable-length strings (e.g. product names) as one UTF-8 blob
+              + int64 offsets.
+
+Both save to plain .npy files and load with mmap_mode="r", so forked or
+separate worker processes share the same pages instead of each unpickling
+its own dicts.
+
+save_id_artifacts / load_id_artifacts write and read the recommender's set
+(users, items, catalog + product names) under an artifact folder; loading
+falls back to the older user2idx/idx2prod/prod_name_map .pkl files.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+
+
+def _to_bytes(values) -> np.ndarray:
+    arr = np.asarray(values)
+    if arr.dtype.kind == "S":
+        return arr
+    arr = arr.astype(str)
+    try:
+        return arr.astype("S")  # fast path: ASCII IDs
+    except UnicodeEncodeError:
+        return np.char.encode(arr, "utf-8")
+
+
+class IdEncoder:
+    """
+    Dict-like (`in`, `[]`, `get`, `len`) so it drops into code written
+    against {id: idx} mappings, plus batch `encode`/`decode`.
+    IDs added at runtime (e.g. new users) go to a small overlay dict.
+    """
+
+    def __init__(self, keys: np.ndarray, order: np.ndarray, rank: np.ndarray):
+        self._keys = keys  # S{w}, sorted
+        self._order = order  # sorted position → index
+        self._rank = rank  # index → sorted position
+        self._extra: dict[str, int] = {}
+        self._extra_ids: list[str] = []
+
+    @classmethod
+    def from_ids(cls, ids) -> "IdEncoder":
+        """Index = position in `ids` (same layout as enumerate-built dicts)."""
+        b = _to_bytes(ids)
+        itype = np.int64 if b.size >= 2**31 else np.int32
+        order = np.argsort(b, kind="stable").astype(itype)
+        keys = b[order]
+        if keys.size > 1 and (keys[1:] == keys[:-1]).any():
+            raise ValueError("IdEncoder ids must be unique")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size, dtype=itype)
+        return cls(keys, order, rank)
+
+    # ----------------------------
+    # Batch API
+    # ----------------------------
+    def encode(self, ids, missing: int = -1) -> np.ndarray:
+        q = _to_bytes(ids).ravel()
+        n = self._keys.size
+        out = np.full(q.size, missing, dtype=np.int64)
+        if n:
+            pos = np.minimum(np.searchsorted(self._keys, q), n - 1)
+            hit = self._keys[pos] == q
+            out[hit] = self._order[pos[hit]]
+        else:
+            hit = np.zeros(q.size, dtype=bool)
+        if self._extra:
+            for i in np.flatnonzero(~hit):
+                out[i] = self._extra.get(q[i].decode("utf-8"), missing)
+        return out
+
+    def decode(self, idx) -> np.ndarray:
+        """Indices → str array (runtime-added IDs included)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        n = self._keys.size
+        if self._extra_ids and (idx >= n).any():
+            return np.array([self.decode_one(int(i)) for i in idx], dtype=str)
+        b = self._keys[self._rank[idx]]
+        try:
+            return b.astype(str)
+        except UnicodeDecodeError:
+            return np.char.decode(b, "utf-8")
+
+    # ----------------------------
+    # Scalar / dict-like API
+    # ----------------------------
+    def get(self, key, default=None):
+        idx = self.encode([key])[0]
+        return default if idx < 0 else int(idx)
+
+    def __getitem__(self, key) -> int:
+        idx = self.get(key)
+        if idx is None:
+            raise KeyError(key)
+        return idx
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self._keys.size + len(self._extra_ids)
+
+    def decode_one(self, idx: int) -> str:
+        n = self._keys.size
+        if idx < n:
+            return self._keys[self._rank[idx]].decode("utf-8")
+        return self._extra_ids[idx - n]
+
+    def add(self, key: str, idx: int | None = None) -> int:
+        """Register an ID unseen at build time; it gets the next index."""
+        nxt = len(self)
+        if idx is not None and idx != nxt:
+            raise ValueError(f"new ids must take the next index ({nxt}), got {idx}")
+        self._extra_ids.append(
+            str(key)
+        )  # before the dict, so a visible key always decodes
+        self._extra[str(key)] = nxt
+        return nxt
+
+    @property
+    def nbytes(self) -> int:
+        return self._keys.nbytes + self._order.nbytes + self._rank.nbytes
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    def save(self, prefix: str | Path):
+        """Writes <prefix>.{keys,order,rank}.npy (build-time IDs only)."""
+        prefix = Path(prefix)
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+        for name in ("keys", "order", "rank"):
+            np.save(f"{prefix}.{name}.npy", getattr(self, f"_{name}"))
+
+    @classmethod
+    def load(cls, prefix: str | Path, mmap: bool = True) -> "IdEncoder":
+        mode = "r" if mmap else None
+        return cls(
+            *(
+                np.load(f"{prefix}.{name}.npy", mmap_mode=mode)
+                for name in ("keys", "order", "rank")
+            )
+        )
+
+    @staticmethod
+    def exists(prefix: str | Path) -> bool:
+        return Path(f"{prefix}.keys.npy").exists()
+
+
+class StringTable:
+    """Immutable list of strings: UTF-8 blob + offsets, O(1) item access."""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data  # uint8
+        self._offsets = offsets  # int64, len = n + 1
+
+    @classmethod
+    def from_strings(cls, strings) -> "StringTable":
+        encoded = [str(s).encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self) -> int:
+        return self._offsets.size - 1
+
+    def __getitem__(self, i: int) -> str:
+        a, b = self._offsets[i], self._offsets[i + 1]
+        return self._data[a:b].tobytes().decode("utf-8")
+
+    def save(self, prefix: str | Path):
+        prefix = Path(prefix)
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+        np.save(f"{prefix}.data.npy", self._data)
+        np.save(f"{prefix}.offsets.npy", self._offsets)
+
+    @classmethod
+    def load(cls, prefix: str | Path, mmap: bool = True) -> "StringTable":
+        mode = "r" if mmap else None
+        return cls(
+            np.load(f"{prefix}.data.npy", mmap_mode=mode),
+            np.load(f"{prefix}.offsets.npy", mmap_mode=mode),
+        )
+
+
+def save_id_artifacts(
+    artifact_dir: str | Path,
+    users: IdEncoder,
+    items: IdEncoder,
+    catalog: IdEncoder,
+    product_names: StringTable,
+):
+    art = Path(artifact_dir)
+    users.save(art / "users")
+    items.save(art / "items")
+    catalog.save(art / "catalog")
+    product_names.save(art / "product_names")
+
+
+def load_id_artifacts(artifact_dir: str | Path, mmap: bool = True):
+    """-> (users, items, catalog, product_names)"""
+    art = Path(artifact_dir)
+    if IdEncoder.exists(art / "users"):
+        return (
+            IdEncoder.load(art / "users", mmap),
+            IdEncoder.load(art / "items", mmap),
+            IdEncoder.load(art / "catalog", mmap),
+            StringTable.load(art / "product_names", mmap),
+        )
+
+    # artifacts exported before the encoders existed
+    import joblib
+
+    idx2user = joblib.load(art / "idx2user.pkl")
+    idx2prod = joblib.load(art / "idx2prod.pkl")
+    names = joblib.load(art / "prod_name_map.pkl")
+    return (
+        IdEncoder.from_ids(idx2user),
+        IdEncoder.from_ids(idx2prod),
+        IdEncoder.from_ids(list(names)),
+        StringTable.from_strings(names.values()),
+    )
@@ -0,0 +1,368 @@
+# project/src/ml/pipeline.py
+
+"""
+Content-addressed, incremental build of artifact stages.
+
+A stage is a function that reads declared inputs (whole files or a subset
+of CSV columns) and upstream stage outputs, and writes files into its own
+output folder. Its key is a hash of:
+
+    stage name + version + config + input fingerprints + upstream output digests
+
+Outputs live in a local store under that key; a run whose key is already
+in the store is skipped and its files are copied into the artifact folder.
+Since upstream *output* digests feed the key, a stage that reruns but
+produces identical files does not invalidate what depends on it. Stages
+whose dependencies are ready run in parallel worker processes.
+
+Store layout (default .cache/build):
+    objects/<key[:2]>/<key>/      stage outputs + _digest + _stage (+ _blobs: blobs the run used)
+    objects/tmp/                  staging folders of running (or crashed) stages
+    blobs/                        free-form content-addressed blocks for stages
+    file_digests.json             (path, size, mtime) → sha256, to skip rehashing
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+
+_META = {
+    "_digest",
+    "_stage",
+    "_blobs",
+}  # bookkeeping files inside an object, not stage outputs
+
+
+def _sha(*parts) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class Store:
+    def __init__(self, root: str | Path = ".cache/build"):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.blobs = self.root / "blobs"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self._digest_path = self.root / "file_digests.json"
+        self._lock = threading.Lock()
+        try:
+            self._file_digests = json.loads(
+                self._digest_path.read_text(encoding="utf-8")
+            )
+        except (OSError, ValueError):
+            self._file_digests = {}
+
+    def object_dir(self, key: str) -> Path:
+        return self.objects / key[:2] / key
+
+    def has(self, key: str) -> bool:
+        return (self.object_dir(key) / "_digest").exists()
+
+    def digest(self, key: str) -> str:
+        return (self.object_dir(key) / "_digest").read_text(encoding="utf-8")
+
+    def staging_dir(self, key: str) -> Path:
+        tmp = self.objects / "tmp" / f"{key}.{uuid.uuid4().hex}"
+        tmp.mkdir(parents=True)
+        return tmp
+
+    def commit(
+        self, key: str, tmp: Path, stage: str = "", replace: bool = False
+    ) -> str:
+        """
+        Seal a staging folder as object `key` of `stage`; returns its output digest.
+        An existing object is kept, unless `replace` (a forced rebuild) swaps it out.
+        """
+        files = sorted(p for p in tmp.rglob("*") if p.is_file() and p.name not in _META)
+        digest = _sha(*(f"{p.relative_to(tmp)}:{self.file_digest(p)}" for p in files))
+        (tmp / "_digest").write_text(digest, encoding="utf-8")
+        (tmp / "_stage").write_text(stage, encoding="utf-8")
+        final = self.object_dir(key)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        old = None
+        if replace and final.exists():
+            # os.replace can't overwrite a non-empty folder: move the old one aside first
+            old = tmp.with_name(f"{tmp.name}.old")
+            os.replace(final, old)
+        try:
+            os.replace(tmp, final)
+        except OSError:  # same key committed concurrently: keep the first
+            shutil.rmtree(tmp, ignore_errors=True)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+        return self.digest(key)
+
+    def file_digest(self, path: str | Path, columns: list[str] | None = None) -> str:
+        """sha256 of a file, or of just some CSV columns; memoised on (size, mtime)."""
+        path = Path(path)
+        st = path.stat()
+        stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        ckey = str(path.resolve()) + (
+            "" if columns is None else "|" + ",".join(columns)
+        )
+        with self._lock:
+            hit = self._file_digests.get(ckey)
+        if hit and hit[0] == stamp:
+            return hit[1]
+
+        if columns is None:
+            h = hashlib.sha256()
+            with open(path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+        else:
+            df = pd.read_csv(path, usecols=columns, dtype=str, keep_default_na=False)
+            rows = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+            digest = _sha(",".join(columns), rows.tobytes())
+        with self._lock:
+            self._file_digests[ckey] = [stamp, digest]
+        return digest
+
+    def save_file_digests(self):
+        with self._lock:
+            tmp = self._digest_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._file_digests), encoding="utf-8")
+            os.replace(tmp, self._digest_path)
+
+    def gc(self, keep: set[str], stages: set[str] | None = None) -> tuple[int, int]:
+        """
+        Delete stage objects not in `keep` (only those of `stages`, if given:
+        a partial run says nothing about the stages it skipped), staging
+        folders left by failed runs, then every blob that no remaining object
+        lists in its _blobs manifest. Returns (objects, blobs) removed.
+        Must not run while a build uses the same store.
+        """
+        removed = 0
+        for d in self.objects.glob("??/*"):
+            if d.name in keep:
+                continue
+            if stages is not None:
+                tag = d / "_stage"
+                if not tag.exists() or tag.read_text(encoding="utf-8") not in stages:
+                    continue
+            shutil.rmtree(d, ignore_errors=True)
+            removed += 1
+        for d in self.objects.glob("tmp/*"):
+            shutil.rmtree(d, ignore_errors=True)
+            removed += 1
+
+        live = set()
+        for manifest in self.objects.glob("??/*/_blobs"):
+            live.update(manifest.read_text(encoding="utf-8").split())
+        removed_blobs = 0
+        for blob in self.blobs.rglob("*"):
+            if blob.is_file() and blob.relative_to(self.blobs).as_posix() not in live:
+                blob.unlink()
+                removed_blobs += 1
+        return removed, removed_blobs
+
+
+@dataclass
+class Input:
+    """A data file, or only some of its CSV columns (edits elsewhere don't invalidate)."""
+
+    path: str
+    columns: list[str] | None = None
+
+    def fingerprint(self, store: Store) -> str:
+        return store.file_digest(self.path, self.columns)
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable  # fn(ctx: StageContext) -> None, module-level so it pickles
+    inputs: dict[str, Input] = field(default_factory=dict)
+    deps: list[str] = field(default_factory=list)
+    config: dict = field(default_factory=dict)
+    options: dict = field(
+        default_factory=dict
+    )  # runtime-only (e.g. n_jobs): not in the key
+    version: str = "1"
+
+
+@dataclass
+class StageContext:
+    inputs: dict[str, str]  # input name → path
+    deps: dict[str, Path]  # upstream stage → its output folder
+    out: Path  # write outputs here
+    config: dict  # Stage.config + Stage.options
+    blobs: Path  # content-addressed scratch shared by all runs
+
+    def record_blobs(self, paths):
+        """List blobs this run reads or wrote, so Store.gc keeps them while the output lives."""
+        with open(self.out / "_blobs", "a", encoding="utf-8") as fh:
+            for p in paths:
+                fh.write(
+                    Path(p).resolve().relative_to(self.blobs.resolve()).as_posix()
+                    + "\n"
+                )
+
+
+@dataclass
+class StageResult:
+    name: str
+    key: str
+    cached: bool
+    seconds: float
+
+
+class _InlineExecutor:
+    """jobs=1: run stages in this process (their own joblib pools then work normally)."""
+
+    def submit(self, fn, *args) -> Future:
+        fut = Future()
+        try:
+            fut.set_result(fn(*args))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _run_stage(fn: Callable, ctx: StageContext) -> float:
+    t0 = time.time()
+    fn(ctx)
+    return time.time() - t0
+
+
+def _topo_check(stages: list[Stage]):
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("duplicate stage names")
+    for s in stages:
+        missing = set(s.deps) - names
+        if missing:
+            raise ValueError(f"stage {s.name!r} depends on unknown {sorted(missing)}")
+
+
+def run_pipeline(
+    stages: list[Stage],
+    out_dir: str | Path,
+    store: Store,
+    jobs: int = 1,
+    force: set[str] | None = None,
+    log: Callable[[str], None] = print,
+) -> list[StageResult]:
+    """
+    Build every stage (in dependency order, independent ones in `jobs` parallel
+    processes) and copy each stage's outputs into `out_dir`. Stages named in
+    `force` rerun.
+    """
+    _topo_check(stages)
+    force = force or set()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    by_name = {s.name: s for s in stages}
+    digests: dict[str, str] = {}
+    keys: dict[str, str] = {}
+    results: list[StageResult] = []
+    pending = {s.name for s in stages}
+    running = {}
+
+    def key_for(stage: Stage) -> str:
+        return _sha(
+            stage.name,
+            stage.version,
+            json.dumps(stage.config, sort_keys=True, default=str),
+            *(
+                f"in:{n}:{i.fingerprint(store)}"
+                for n, i in sorted(stage.inputs.items())
+            ),
+            *(f"dep:{d}:{digests[d]}" for d in sorted(stage.deps)),
+        )
+
+    def finish(stage: Stage, key: str, cached: bool, seconds: float):
+        digests[stage.name] = store.digest(key)
+        keys[stage.name] = key
+        _materialise(store.object_dir(key), out_dir)
+        results.append(StageResult(stage.name, key, cached, seconds))
+        log(
+            f"[{'cached' if cached else 'built '}] {stage.name:<14} {seconds:6.2f}s  {key[:12]}"
+        )
+
+    def launch(pool) -> bool:
+        """Resolve or submit every stage whose deps are done; True if any cache hit."""
+        hit = False
+        for name in sorted(pending):
+            stage = by_name[name]
+            if not all(d in digests for d in stage.deps):
+                continue
+            pending.discard(name)
+            key = key_for(stage)
+            if store.has(key) and name not in force:
+                finish(stage, key, True, 0.0)
+                hit = True
+                continue
+            ctx = StageContext(
+                inputs={n: i.path for n, i in stage.inputs.items()},
+                deps={d: store.object_dir(keys[d]) for d in stage.deps},
+                out=store.staging_dir(key),
+                config={**stage.config, **stage.options},
+                blobs=store.blobs,
+            )
+            running[pool.submit(_run_stage, stage.fn, ctx)] = (stage, key, ctx.out)
+        return hit
+
+    pool = (
+        ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context("spawn"))
+        if jobs > 1
+        else _InlineExecutor()
+    )
+    with pool:
+        while pending or running:
+            while launch(pool):  # cache hits can unblock further stages
+                pass
+            if not running:
+                if pending:
+                    raise RuntimeError(f"unresolvable stages: {sorted(pending)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, key, tmp = running.pop(fut)
+                seconds = fut.result()
+                store.commit(key, tmp, stage.name, replace=stage.name in force)
+                finish(stage, key, False, seconds)
+
+    store.save_file_digests()
+    return results
+
+
+def _materialise(obj: Path, out_dir: Path):
+    """Copy a stage's files into the artifact folder (skipped when already identical)."""
+    for src in obj.rglob("*"):
+        if not src.is_file() or src.name in _META:
+            continue
+        dst = out_dir / src.relative_to(obj)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        s, d = src.stat(), dst.stat() if dst.exists() else None
+        if d is not None and (d.st_size, d.st_mtime_ns) == (s.st_size, s.st_mtime_ns):
+            continue
+        # copy, not link: scripts that rewrite artifacts in place must not touch the store
+        tmp = dst.with_name(f".{dst.name}.tmp")
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
@@ -0,0 +1,57 @@
+# project/src/ml/recommenders/batch.py
+
+from __future__ import annotations
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csr_matrix
+
+
+def topk_for_rows(
+    R_rows: csr_matrix,
+    sim,
+    k: int = 10,
+    exclude_seen: bool = True,
+    mask: np.ndarray | None = None,
+):
+    """
+    Batched item–item scoring for a block of users.
+
+    R_rows : csr_matrix (b × items), the users' interaction rows
+    sim    : item×item similarity (dense ndarray, memmap or sparse)
+    mask   : optional boolean item mask (filters.FilterIndex.mask); items
+             outside it are dropped before top-k
+
+    score(u) = Σ_{j ∈ seen(u)} sim[:, j]  ==  R_rows @ sim  (sim is symmetric),
+    so the whole block is one sparse × dense product instead of b column
+    gathers. Returns (top_idx, top_scores), both (b × k), best first; entries
+    for excluded/empty slots hold -inf.
+    """
+    scores = R_rows @ sim
+    if sparse.issparse(scores):
+        scores = scores.toarray()
+    scores = np.asarray(scores, dtype=np.float32)
+
+    n_rows, n_items = scores.shape
+    if exclude_seen and R_rows.nnz:
+        rows = np.repeat(np.arange(n_rows), np.diff(R_rows.indptr))
+        scores[rows, R_rows.indices] = -np.inf
+    if mask is not None:
+        scores[:, ~mask] = -np.inf
+
+    return topk_dense(scores, k)
+
+
+def topk_dense(scores: np.ndarray, k: int):
+    """Row-wise top-k of a (b × n) score block → (top_idx, top_scores), best first."""
+    n_rows, n_items = scores.shape
+    k = min(k, n_items)
+    if k <= 0:
+        empty = np.empty((n_rows, 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+
+    top = np.argpartition(scores, -k, axis=1)[:, -k:]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    return top, top_scores
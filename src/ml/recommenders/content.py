@@ -0,0 +1,108 @@
+# project/src/ml/recommenders/content.py
+
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from .neighbours import topn_neighbours
+
+
+def product_text(products: pd.DataFrame) -> pd.Series:
+    """product_name + about_product (bullet points are '|'-separated in the dump)."""
+    name = products["product_name"].fillna("").astype(str)
+    about = (
+        products["about_product"]
+        .fillna("")
+        .astype(str)
+        .str.replace("|", " ", regex=False)
+    )
+    return name + " " + about
+
+
+def content_matrix(
+    texts,
+    n_features: int = 2**20,
+    min_df: int = 2,
+    max_df: float = 0.2,
+) -> csr_matrix:
+    """
+    Hashed TF-IDF (sublinear tf, smooth idf), rows L2-normalised.
+    Terms in fewer than `min_df` docs or more than `max_df` of them are dropped:
+    rare ones can't link two products and ubiquitous ones would make every
+    block of the neighbour product dense.
+    """
+    X = HashingVectorizer(
+        n_features=n_features,
+        alternate_sign=False,
+        norm=None,
+        stop_words="english",
+        dtype=np.float32,
+    ).transform(texts)
+    n_docs = X.shape[0]
+
+    df = np.bincount(X.indices, minlength=n_features)
+    keep = (df >= min_df) & (df <= max_df * n_docs)
+    X.data[~keep[X.indices]] = 0
+    X.eliminate_zeros()
+
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+    X.data = (1 + np.log(X.data)) * idf[X.indices]
+    return normalize(X, norm="l2", copy=False)
+
+
+def build_content_neighbours(
+    products: pd.DataFrame,
+    n: int = 50,
+    block_size: int = 256,
+    n_jobs: int = -1,
+    **tfidf,
+) -> csr_matrix:
+    """Top-N content neighbours, indexed in `products` row order."""
+    X = content_matrix(product_text(products), **tfidf)
+    return topn_neighbours(X, n=n, block_size=block_size, n_jobs=n_jobs)
+
+
+def blend_similar(
+    j_content: int | None,
+    j_cf: int | None,
+    content_nn: csr_matrix,
+    cf_sim,
+    cf_to_content: np.ndarray,
+    content_weight: float,
+    k: int,
+    mask: np.ndarray | None = None,
+):
+    """
+    Blend content neighbours with item–item CF similarities in the content
+    index space (a superset: products without reviews only have content).
+    score = w · content + (1 − w) · cf. Returns (indices, scores), best first.
+    `mask` (boolean over the content space) drops items before top-k.
+    """
+    n_items = content_nn.shape[0]
+    scores = np.zeros(n_items, dtype=np.float32)
+
+    if j_content is not None and content_weight > 0:
+        a, b = content_nn.indptr[j_content], content_nn.indptr[j_content + 1]
+        scores[content_nn.indices[a:b]] += content_weight * content_nn.data[a:b]
+
+    if j_cf is not None and content_weight < 1:
+        row = cf_sim[j_cf]
+        if hasattr(row, "toarray"):  # sparse neighbour row
+            row = row.toarray().ravel()
+        row = np.asarray(row, dtype=np.float32)
+        mapped = cf_to_content >= 0
+        np.add.at(scores, cf_to_content[mapped], (1 - content_weight) * row[mapped])
+
+    if j_content is not None:
+        scores[j_content] = 0.0
+    if mask is not None:
+        scores[~mask] = 0.0
+
+    candidates = np.flatnonzero(scores > 0)
+    if candidates.size > k:
+        candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order], scores[candidates[order]]
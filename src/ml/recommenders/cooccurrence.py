@@ -0,0 +1,108 @@
+# project/src/ml/recommenders/cooccurrence.py
+
+"""
+Item co-occurrence counts C = Rᵀ R, built in item slabs that are cached by
+content, and the item–item cosine similarity derived from them.
+
+Slab [lo, hi) of C only depends on the rows of R (users) that touch an item
+in [lo, hi). Its cache key is the sorted multiset of those rows' hashes, so
+after a few new interactions only the slabs containing the affected users'
+items are recomputed; everything else is read back from `cache_dir`.
+"""
+
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csr_matrix
+
+_SLAB_VERSION = b"cooc-v1"
+
+
+def _item_hashes(n_items: int) -> np.ndarray:
+    """splitmix64 of each item index: a fixed random 64-bit code per item."""
+    z = np.arange(n_items, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def row_hashes(R: csr_matrix) -> np.ndarray:
+    """Order-independent 64-bit hash per row: Σ item_code · value (mod 2⁶⁴)."""
+    R = R.tocsr()
+    codes = _item_hashes(R.shape[1])[R.indices] * R.data.astype(np.uint64)
+    cs = np.concatenate([[np.uint64(0)], np.cumsum(codes, dtype=np.uint64)])
+    return cs[R.indptr[1:]] - cs[R.indptr[:-1]]
+
+
+def _slab_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / key[:2] / f"{key}.npz"
+
+
+def cooccurrence(
+    R: csr_matrix, block_size: int = 256, cache_dir: str | Path | None = None
+) -> tuple[csr_matrix, dict]:
+    """
+    C = Rᵀ R (items × items, sparse) in slabs of `block_size` item rows.
+    Returns (C, {"slabs": n, "reused": m, "paths": cached slab files used}).
+    """
+    R = R.tocsr().astype(np.float32)
+    n_items = R.shape[1]
+    Rc = R.tocsc()
+    hashes = row_hashes(R) if cache_dir is not None else None
+    cache_dir = Path(cache_dir) if cache_dir is not None else None
+
+    slabs, reused, paths = [], 0, []
+    for lo in range(0, n_items, block_size):
+        hi = min(lo + block_size, n_items)
+        users = np.unique(Rc.indices[Rc.indptr[lo] : Rc.indptr[hi]])
+
+        path = None
+        if cache_dir is not None:
+            key = hashlib.sha256(
+                _SLAB_VERSION
+                + np.array([lo, hi]).tobytes()
+                + np.sort(hashes[users]).tobytes()
+            ).hexdigest()
+            path = _slab_path(cache_dir, key)
+            paths.append(path)
+            if path.exists():
+                slab = sparse.load_npz(path).tocsr()
+                slab.resize(
+                    (hi - lo, n_items)
+                )  # items appended since: columns only grow
+                slabs.append(slab)
+                reused += 1
+                continue
+
+        sub = R[users]
+        slab = (sub[:, lo:hi].T @ sub).tocsr()
+        slabs.append(slab)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.tmp.npz")
+            sparse.save_npz(tmp, slab)
+            tmp.replace(path)
+
+    C = (
+        sparse.vstack(slabs, format="csr")
+        if slabs
+        else csr_matrix((0, 0), dtype=np.float32)
+    )
+    return C, {"slabs": len(slabs), "reused": reused, "paths": paths}
+
+
+def cosine_from_cooccurrence(C: csr_matrix) -> np.ndarray:
+    """
+    Dense item–item cosine (diagonal zeroed) from co-occurrence counts; equal
+    to cosine_similarity(R.T) for binary R.
+    """
+    norms = np.sqrt(C.diagonal()).astype(np.float32)
+    inv = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    sim = C.toarray().astype(np.float32, copy=False)
+    sim *= inv[:, None]
+    sim *= inv[None, :]
+    np.fill_diagonal(sim, 0.0)
+    return sim
@@ -0,0 +1,238 @@
+# project/src/ml/recommenders/filters.py
+
+"""
+Bitmap index over item indices for constrained recommendations
+("Cables&Accessories under ₹500 rated ≥ 4").
+
+Every category (each level of the products.csv category path, plus
+product_categories.csv) and every bucket of the numeric attributes gets a
+bitset packed into uint64 words. A filter is ANDs/ORs of a few bitsets,
+unpacked once into a boolean mask that scoring applies before top-k, so a
+constrained query costs about the same as an unconstrained one.
+
+Numeric ranges OR the buckets that lie fully inside the range; the (at
+most two) buckets straddling a bound are refined against the raw values
+of their members only.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class FilterError(ValueError):
+    """A filter request that can't be served (e.g. no filter index was built)."""
+
+
+# Bucket edges per numeric attribute; a bucket is [edges[b], edges[b+1])
+NUMERIC_EDGES = {
+    "price": np.array(
+        [
+            0,
+            100,
+            200,
+            300,
+            500,
+            750,
+            1000,
+            1500,
+            2000,
+            3000,
+            5000,
+            10000,
+            20000,
+            50000,
+            np.inf,
+        ]
+    ),
+    "rating": np.round(np.append(np.arange(0.0, 5.05, 0.1), np.inf), 1),
+    "rating_count": np.array([0, 10, 100, 1000, 10000, 100000, np.inf]),
+}
+
+
+def _number(s: pd.Series) -> np.ndarray:
+    """'₹1,099' / '24,269' / '4.2' → float (NaN when unparseable)."""
+    cleaned = s.astype(str).str.replace(r"[₹,%\s]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    n_words = (mask.size + 63) // 64
+    buf = np.zeros(n_words * 8, dtype=np.uint8)
+    packed = np.packbits(mask, bitorder="little")
+    buf[: packed.size] = packed
+    return buf.view(np.uint64)
+
+
+def _unpack(words: np.ndarray, n: int) -> np.ndarray:
+    return np.unpackbits(words.view(np.uint8), count=n, bitorder="little").astype(bool)
+
+
+class FilterIndex:
+    """
+    Bitsets over items 0..n-1: one per category and per numeric bucket.
+    mask(...) turns a filter into a boolean item mask (None = unfiltered).
+    """
+
+    def __init__(self, n: int, names, words: np.ndarray, values: dict[str, np.ndarray]):
+        self.n = n
+        self.names = np.asarray(
+            names, dtype=str
+        )  # "category:<name>" / "<attr>:<bucket>"
+        self.words = words  # uint64, (n_bitsets × ceil(n/64))
+        self.values = values  # raw numeric columns, for the boundary buckets
+        self._row = {name.lower(): i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_products(
+        cls, products: pd.DataFrame, product_categories: pd.DataFrame | None = None
+    ) -> "FilterIndex":
+        """Index in `products` row order (deduplicate product_id first)."""
+        products = products.reset_index(drop=True)
+        n = len(products)
+        pos = pd.Series(
+            np.arange(n), index=products["product_id"].astype(str).to_numpy()
+        )
+
+        cats = (
+            products["category"]
+            .fillna("")
+            .astype(str)
+            .str.split("|")
+            .explode()
+            .str.strip()
+        )
+        pairs = pd.DataFrame(
+            {"item": np.arange(n)[cats.index], "category": cats.to_numpy()}
+        )
+        if product_categories is not None:
+            extra = product_categories.assign(
+                item=product_categories["product_id"].astype(str).map(pos)
+            )
+            pairs = pd.concat(
+                [pairs, extra.dropna(subset=["item"])[["item", "category"]]]
+            )
+        pairs = pairs[pairs["category"] != ""].drop_duplicates()
+
+        names, bitsets = [], []
+        for category, items in pairs.groupby("category")["item"]:
+            mask = np.zeros(n, dtype=bool)
+            mask[items.to_numpy(dtype=np.int64)] = True
+            names.append(f"category:{category}")
+            bitsets.append(_pack(mask))
+
+        values = {
+            "price": _number(products["discounted_price"]),
+            "rating": _number(products["rating"]),
+            "rating_count": _number(products["rating_count"]),
+        }
+        for attr, edges in NUMERIC_EDGES.items():
+            bucket = (
+                np.searchsorted(edges, values[attr], side="right") - 1
+            )  # NaN → last+1
+            for b in range(edges.size - 1):
+                names.append(f"{attr}:{b}")
+                bitsets.append(_pack(bucket == b))
+
+        n_words = (n + 63) // 64
+        words = (
+            np.vstack(bitsets) if bitsets else np.zeros((0, n_words), dtype=np.uint64)
+        )
+        return cls(n, names, words, values)
+
+    # ----------------------------
+    # Queries
+    # ----------------------------
+    @property
+    def categories(self) -> list[str]:
+        return [s.split(":", 1)[1] for s in self.names if s.startswith("category:")]
+
+    def _bits(self, name: str) -> np.ndarray:
+        i = self._row.get(name.lower())
+        return (
+            self.words[i]
+            if i is not None
+            else np.zeros(self.words.shape[1], dtype=np.uint64)
+        )
+
+    def _range(self, attr: str, lo: float | None, hi: float | None) -> np.ndarray:
+        """Bitset of items with lo ≤ attr ≤ hi (missing values never match)."""
+        edges = NUMERIC_EDGES[attr]
+        lo = -np.inf if lo is None else lo
+        hi = np.inf if hi is None else hi
+        out = np.zeros(self.words.shape[1], dtype=np.uint64)
+        first = max(np.searchsorted(edges, lo, side="right") - 1, 0)
+        last = min(np.searchsorted(edges, hi, side="right") - 1, edges.size - 2)
+        for b in range(first, last + 1):
+            a, z = edges[b], edges[b + 1]
+            bits = self._bits(f"{attr}:{b}")
+            if a < lo or z > hi:  # straddles a bound: check its members exactly
+                members = np.flatnonzero(_unpack(bits, self.n))
+                v = self.values[attr][members]
+                keep = np.zeros(self.n, dtype=bool)
+                keep[members[(v >= lo) & (v <= hi)]] = True
+                bits = _pack(keep)
+            out |= bits
+        return out
+
+    def mask(
+        self,
+        categories: list[str] | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_rating: float | None = None,
+        min_rating_count: float | None = None,
+    ) -> np.ndarray | None:
+        """
+        Items in ANY of `categories` AND within every given bound.
+        Returns None when nothing is constrained (None or [] categories and
+        every bound None; 0 is a bound).
+        """
+        parts = []
+        if categories is not None and len(categories) > 0:
+            bits = np.zeros(self.words.shape[1], dtype=np.uint64)
+            for c in categories:
+                bits |= self._bits(f"category:{c}")
+            parts.append(bits)
+        if min_price is not None or max_price is not None:
+            parts.append(self._range("price", min_price, max_price))
+        if min_rating is not None:
+            parts.append(self._range("rating", min_rating, None))
+        if min_rating_count is not None:
+            parts.append(self._range("rating_count", min_rating_count, None))
+        if not parts:
+            return None
+        return _unpack(np.bitwise_and.reduce(parts), self.n)
+
+    # ----------------------------
+    # Re-indexing / persistence
+    # ----------------------------
+    def take(self, idx) -> "FilterIndex":
+        """Index over another item space: new item i = old item idx[i] (-1 → matches nothing)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        valid = idx >= 0
+        words = np.empty((self.words.shape[0], (idx.size + 63) // 64), dtype=np.uint64)
+        for r in range(self.words.shape[0]):
+            words[r] = _pack(_unpack(self.words[r], self.n)[idx] & valid)
+        values = {}
+        for attr, v in self.values.items():
+            values[attr] = np.where(valid, v[np.where(valid, idx, 0)], np.nan)
+        return FilterIndex(idx.size, self.names, words, values)
+
+    def save(self, path: str | Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            n=self.n,
+            names=self.names,
+            words=self.words,
+            **{f"values_{k}": v for k, v in self.values.items()},
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "FilterIndex":
+        z = np.load(path)
+        values = {k[len("values_") :]: z[k] for k in z.files if k.startswith("values_")}
+        return cls(int(z["n"]), z["names"], z["words"], values)
@@ -0,0 +1,209 @@
+# project/src/ml/recommenders/interactions.py
+
+from __future__ import annotations
+import threading
+import time
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class CapacityError(RuntimeError):
+    """The overlay or the new-user budget is full; the event was not recorded."""
+
+
+class InteractionStore:
+    """
+    User×item interactions = immutable base CSR + in-memory per-user delta overlay.
+    - add(uidx, iidx) records a fresh interaction without rebuilding R
+    - seen(uidx) returns the user's base row merged with the overlay
+    - compact() folds the overlay into a new base CSR and swaps it in
+
+    Once `max_pending` overlay pairs accumulate (or `compact_interval_s`
+    elapses) add() hands compaction to a background thread and returns, so
+    the /events request never pays for the CSR rebuild. That rebuild is
+    O(nnz(R) + pending) — roughly a full copy of R — and while it runs new
+    adds go to a fresh overlay.
+
+    Memory is hard-capped: add() raises CapacityError once `max_overlay`
+    pairs (default 4 × max_pending) are waiting to be compacted, and
+    add_user() once `max_new_users` users were added since training.
+    The base matrix is never mutated in place, so readers only need the
+    lock to grab a consistent (base, frozen, delta) snapshot.
+    """
+
+    def __init__(
+        self,
+        R: csr_matrix,
+        max_pending: int = 50_000,
+        compact_interval_s: float = 300.0,
+        max_overlay: int | None = None,
+        max_new_users: int = 100_000,
+    ):
+        R = R.tocsr()
+        R.sum_duplicates()  # sorted, unique column indices per row
+        self._R = R
+        self._n_users, self.n_items = R.shape
+        self.max_pending = max_pending
+        self.compact_interval_s = compact_interval_s
+        self.max_overlay = 4 * max_pending if max_overlay is None else max_overlay
+        self.max_new_users = max_new_users
+        self._trained_users = self._n_users
+
+        self._delta: dict[int, set[int]] = {}  # uidx -> new item indices
+        self._frozen: dict[int, set[int]] = {}  # overlay being compacted
+        self._pending = 0
+        self._n_frozen = 0
+        self._last_compact = time.monotonic()
+
+        self._lock = threading.Lock()  # guards overlay dicts + base swap
+        self._compact_lock = threading.Lock()  # one compaction at a time
+        self._worker: threading.Thread | None = None  # background compaction, if any
+
+    @property
+    def matrix(self) -> csr_matrix:
+        """Current base matrix (does not include un-compacted deltas)."""
+        return self._R
+
+    @property
+    def n_users(self) -> int:
+        return self._n_users
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def add_user(self) -> int:
+        """Reserve a row index for a user unseen at training time."""
+        with self._lock:
+            if self._n_users - self._trained_users >= self.max_new_users:
+                raise CapacityError(
+                    f"new-user limit reached ({self.max_new_users} since training)"
+                )
+            uidx = self._n_users
+            self._n_users += 1
+            return uidx
+
+    def _in_base(self, R: csr_matrix, uidx: int, iidx: int) -> bool:
+        if uidx >= R.shape[0]:
+            return False
+        row = R.indices[R.indptr[uidx] : R.indptr[uidx + 1]]
+        pos = np.searchsorted(row, iidx)
+        return pos < row.size and row[pos] == iidx
+
+    def add(self, uidx: int, iidx: int) -> bool:
+        """
+        Record (uidx, iidx). Returns False if it was already known; raises
+        CapacityError (after starting a compaction) if the overlay is full.
+        """
+        if not 0 <= iidx < self.n_items:
+            raise IndexError(f"item index {iidx} out of range")
+
+        with self._lock:
+            if not 0 <= uidx < self._n_users:
+                raise IndexError(f"user index {uidx} out of range")
+            if self._in_base(self._R, uidx, iidx) or iidx in self._frozen.get(uidx, ()):
+                return False
+            if iidx in self._delta.get(uidx, ()):
+                return False
+            full = self._pending + self._n_frozen >= self.max_overlay
+            if not full:
+                self._delta.setdefault(uidx, set()).add(iidx)
+                self._pending += 1
+            due = (
+                full
+                or self._pending >= self.max_pending
+                or time.monotonic() - self._last_compact >= self.compact_interval_s
+            )
+
+        if due:
+            self._compact_in_background()
+        if full:
+            raise CapacityError(f"{self.max_overlay} interactions awaiting compaction")
+        return True
+
+    def _compact_in_background(self):
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self.compact,
+                kwargs={"block": False},
+                name="csr-compaction",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def wait_for_compaction(self, timeout: float | None = None) -> bool:
+        """Block until a background compaction (if any) finishes; False on timeout."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+            return not worker.is_alive()
+        return True
+
+    def seen(self, uidx: int) -> np.ndarray:
+        """Item indices the user interacted with (base row ∪ overlay)."""
+        with self._lock:
+            R = self._R
+            extra = self._delta.get(uidx, set()) | self._frozen.get(uidx, set())
+
+        if uidx < R.shape[0]:
+            base = R.indices[R.indptr[uidx] : R.indptr[uidx + 1]]
+        else:
+            base = np.empty(0, dtype=R.indices.dtype)
+
+        if not extra:
+            return base
+        return np.union1d(base, np.fromiter(extra, dtype=base.dtype, count=len(extra)))
+
+    def compact(self, block: bool = True) -> bool:
+        """
+        Fold the overlay into a new base CSR. The new matrix is built outside
+        the main lock; readers keep seeing the frozen overlay until the swap.
+        Returns False if another compaction was already running (block=False).
+        """
+        if not self._compact_lock.acquire(blocking=block):
+            return False
+        try:
+            with self._lock:
+                self._frozen, self._delta = self._delta, {}
+                frozen = self._frozen
+                self._n_frozen, self._pending = self._pending, 0
+                R = self._R
+                n_users = self._n_users
+
+            new_R = self._merge(R, frozen, n_users) if frozen else R
+
+            with self._lock:
+                self._R = new_R
+                self._frozen = {}
+                self._n_frozen = 0
+                self._last_compact = time.monotonic()
+            return True
+        finally:
+            self._compact_lock.release()
+
+    def _merge(
+        self, R: csr_matrix, frozen: dict[int, set[int]], n_users: int
+    ) -> csr_matrix:
+        """New base CSR = R (padded to n_users rows) + the frozen overlay."""
+        rows = np.fromiter(
+            (u for u, items in frozen.items() for _ in items), dtype=np.int64
+        )
+        cols = np.fromiter(
+            (i for items in frozen.values() for i in items), dtype=np.int64
+        )
+        D = csr_matrix(
+            (np.ones(rows.size, dtype=R.dtype), (rows, cols)),
+            shape=(n_users, self.n_items),
+        )
+        if R.shape[0] < n_users:
+            # pad with empty rows for users added since the last build
+            pad = np.full(n_users - R.shape[0], R.indptr[-1], dtype=R.indptr.dtype)
+            R = csr_matrix(
+                (R.data, R.indices, np.concatenate([R.indptr, pad])),
+                shape=(n_users, self.n_items),
+            )
+        new_R = (R + D).tocsr()
+        new_R.sum_duplicates()
+        return new_R
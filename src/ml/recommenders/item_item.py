@@ -7,6 +7,10 @@ from pathlib import Path
 from scipy.sparse import csr_matrix
 from sklearn.metrics.pairwise import cosine_similarity
 
+from ..dedup import canonicalise
+from ..encoders import IdEncoder, StringTable
+from .content import blend_similar, build_content_neighbours
+
 
 class ItemItemRecommender:
     """
@@ -14,19 +18,31 @@ class ItemItemRecommender:
     - fit() builds the user×item matrix and item–item similarity
     - recommend_for_user(user_id, k)
     - similar_items(product_id, k)
+    - fit_content() adds product-text neighbours that similar_items() blends in,
+      so products with few or no reviews still get neighbours
+
+    If data_dir has product_canonical.csv (src/dedup.py), near-duplicate
+    listings are folded onto their canonical product before R is built, and
+    lookups by a duplicate ID use its canonical product.
     """
 
     def __init__(self, data_dir: str | Path):
         self.data_dir = Path(data_dir)
         self.products = None
         self.reviews = None
-        self.user2idx = {}
-        self.idx2user = None
-        self.item2idx = {}
-        self.idx2item = None
+        self.user2idx = IdEncoder.from_ids([])  # user_id ↔ row of R
+        self.item2idx = IdEncoder.from_ids([])  # product_id ↔ column of R
         self.R = None  # csr_matrix users × items
         self.item_item_sim = None  # np.ndarray (items × items)
-        self.prod_name_map = {}
+        self.catalog = IdEncoder.from_ids([])  # every product in products.csv
+        self.product_names = StringTable.from_strings([])  # aligned with catalog
+        # content-based neighbours (optional, see fit_content), indexed like catalog
+        self.content_nn = None  # csr_matrix top-N (products × products)
+        self.cf_to_content = None  # CF item index → catalog index (-1 if absent)
+        self.content_weight = 0.0
+        self.canonical: dict[str, str] = (
+            {}
+        )  # duplicate product_id → canonical product_id
 
     def _load(self):
         dd = self.data_dir
@@ -36,30 +52,40 @@ class ItemItemRecommender:
         self.reviews["user_id"] = self.reviews["user_id"].astype(str)
         self.reviews["product_id"] = self.reviews["product_id"].astype(str)
 
-        self.prod_name_map = self.products.set_index("product_id")["product_name"].to_dict()
+        canonical_path = dd / "product_canonical.csv"
+        if canonical_path.exists():
+            mapping = pd.read_csv(canonical_path, dtype=str)
+            self.canonical = dict(mapping.itertuples(index=False, name=None))
+            self.reviews["product_id"] = canonicalise(
+                self.reviews["product_id"], mapping
+            )
+
+        catalog = self.products.drop_duplicates("product_id")
+        self.catalog = IdEncoder.from_ids(catalog["product_id"].to_numpy())
+        self.product_names = StringTable.from_strings(
+            catalog["product_name"].fillna("")
+        )
 
     def fit(self):
         self._load()
 
         # Build implicit interactions (dedup)
-        interactions = self.reviews[["user_id", "product_id"]].dropna().drop_duplicates()
+        interactions = (
+            self.reviews[["user_id", "product_id"]].dropna().drop_duplicates()
+        )
 
         # Encode IDs → indices
-        user_ids = interactions["user_id"].unique()
-        item_ids = interactions["product_id"].unique()
+        self.user2idx = IdEncoder.from_ids(interactions["user_id"].unique())
+        self.item2idx = IdEncoder.from_ids(interactions["product_id"].unique())
 
-        self.user2idx = {u: i for i, u in enumerate(user_ids)}
-        self.idx2user = np.array(user_ids)
-
-        self.item2idx = {p: j for j, p in enumerate(item_ids)}
-        self.idx2item = np.array(item_ids)
-
-        ui = interactions["user_id"].map(self.user2idx).values
-        ii = interactions["product_id"].map(self.item2idx).values
+        ui = self.user2idx.encode(interactions["user_id"].to_numpy())
+        ii = self.item2idx.encode(interactions["product_id"].to_numpy())
         vv = np.ones(len(interactions), dtype=np.float32)
 
         # Sparse user×item matrix
-        self.R = csr_matrix((vv, (ui, ii)), shape=(len(self.user2idx), len(self.item2idx)))
+        self.R = csr_matrix(
+            (vv, (ui, ii)), shape=(len(self.user2idx), len(self.item2idx))
+        )
 
         # Item–item cosine similarity (on columns)
         self.item_item_sim = cosine_similarity(self.R.T)  # (n_items, n_items)
@@ -67,8 +93,25 @@ class ItemItemRecommender:
 
         return self
 
-    def _pname(self, pid: str) -> str:
-        return self.prod_name_map.get(str(pid), str(pid))
+    def fit_content(
+        self, n_neighbours: int = 50, content_weight: float = 0.3, n_jobs: int = -1
+    ):
+        if self.products is None:
+            self._load()
+        products = self.products.drop_duplicates("product_id").reset_index(drop=True)
+        self.content_nn = build_content_neighbours(
+            products, n=n_neighbours, n_jobs=n_jobs
+        )
+        self.cf_to_content = self.catalog.encode(
+            self.item2idx.decode(np.arange(len(self.item2idx)))
+        )
+        self.content_weight = content_weight
+        return self
+
+    def _pnames(self, pids: list[str]) -> list[str]:
+        """Readable names for a batch of product IDs (the ID itself if unknown)."""
+        jj = self.catalog.encode(pids)
+        return [self.product_names[j] if j >= 0 else p for p, j in zip(pids, jj)]
 
     def recommend_for_user(self, user_id: str, k: int = 10, exclude_seen: bool = True):
         if user_id not in self.user2idx:
@@ -89,20 +132,18 @@ class ItemItemRecommender:
         topk = np.argpartition(scores, -k)[-k:]
         topk = topk[np.argsort(scores[topk])[::-1]]
 
-        out = []
-        for j in topk:
-            pid = self.idx2item[j]
-            out.append(
-                {
-                    "product_id": pid,
-                    "score": float(scores[j]),
-                    "product_name": self._pname(pid),
-                }
-            )
-        return out
-
-    def similar_items(self, product_id: str, k: int = 10):
-        pid = str(product_id)
+        pids = self.item2idx.decode(topk).tolist()
+        return [
+            {"product_id": pid, "score": float(scores[j]), "product_name": name}
+            for j, pid, name in zip(topk, pids, self._pnames(pids))
+        ]
+
+    def similar_items(
+        self, product_id: str, k: int = 10, content_weight: float | None = None
+    ):
+        pid = self.canonical.get(str(product_id), str(product_id))
+        if self.content_nn is not None:
+            return self._similar_blended(pid, k, content_weight)
         if pid not in self.item2idx:
             return []
         j = self.item2idx[pid]
@@ -115,16 +156,42 @@ class ItemItemRecommender:
         topk = np.argpartition(sims, -k)[-k:]
         topk = topk[np.argsort(sims[topk])[::-1]]
 
-        out = []
-        for jj in topk:
-            if jj == j:
-                continue
-            pid2 = self.idx2item[jj]
-            out.append(
-                {
-                    "product_id": pid2,
-                    "similarity": float(sims[jj]),
-                    "product_name": self._pname(pid2),
-                }
-            )
-        return out
+        topk = topk[topk != j]
+        pids = self.item2idx.decode(topk).tolist()
+        return [
+            {"product_id": pid2, "similarity": float(sims[jj]), "product_name": name}
+            for jj, pid2, name in zip(topk, pids, self._pnames(pids))
+        ]
+
+    def _similar_blended(self, pid: str, k: int, content_weight: float | None):
+        w = self.content_weight if content_weight is None else content_weight
+        j_content = self.catalog.get(pid)
+        j_cf = self.item2idx.get(pid)
+        if j_content is None and j_cf is None:
+            return []
+
+        # other listings of one product are not "similar products"
+        keep = None
+        if self.canonical:
+            keep = np.ones(len(self.catalog), dtype=bool)
+            dup = self.catalog.encode(list(self.canonical))
+            keep[dup[dup >= 0]] = False
+        idx, scores = blend_similar(
+            j_content,
+            j_cf,
+            self.content_nn,
+            self.item_item_sim,
+            self.cf_to_content,
+            w,
+            k,
+            keep,
+        )
+        pids = self.catalog.decode(idx).tolist()
+        return [
+            {
+                "product_id": pid2,
+                "similarity": float(s),
+                "product_name": self.product_names[jj],
+            }
+            for jj, pid2, s in zip(idx, pids, scores)
+        ]
@@ -0,0 +1,85 @@
+# project/src/ml/recommenders/neighbours.py
+
+"""
+Compact top-N neighbour lists.
+
+Format: an items × items CSR matrix holding at most N (neighbour, similarity)
+pairs per row (int32 indices, float32 data), saved as .npz together with the
+item IDs of its index space. Memory is O(items · N) instead of O(items²).
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.sparse import csr_matrix
+
+
+def _row_topn(cols: np.ndarray, vals: np.ndarray, self_idx: int, n: int):
+    keep = (cols != self_idx) & (vals > 0)
+    cols, vals = cols[keep], vals[keep]
+    if cols.size > n:
+        top = np.argpartition(vals, -n)[-n:]
+        cols, vals = cols[top], vals[top]
+    return cols, vals
+
+
+def _block_topn(X: csr_matrix, lo: int, hi: int, n: int):
+    # sparse (block × items) product: no dense items × items intermediate
+    S = (X[lo:hi] @ X.T).tocsr()
+    rows, cols, vals = [], [], []
+    for r in range(hi - lo):
+        a, b = S.indptr[r], S.indptr[r + 1]
+        c, v = _row_topn(S.indices[a:b], S.data[a:b], lo + r, n)
+        rows.append(np.full(c.size, lo + r, dtype=np.int32))
+        cols.append(c.astype(np.int32))
+        vals.append(v.astype(np.float32))
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+
+def topn_neighbours(
+    X: csr_matrix, n: int = 50, block_size: int = 256, n_jobs: int = -1
+) -> csr_matrix:
+    """
+    Cosine top-N neighbours for every row of an L2-normalised sparse matrix X
+    (items × features), computed in row blocks across `n_jobs` processes.
+    """
+    X = X.tocsr().astype(np.float32)
+    n_items = X.shape[0]
+    blocks = [
+        (lo, min(lo + block_size, n_items)) for lo in range(0, n_items, block_size)
+    ]
+    parts = Parallel(n_jobs=n_jobs)(
+        delayed(_block_topn)(X, lo, hi, n) for lo, hi in blocks
+    )
+    return _assemble(parts, n_items)
+
+
+def _assemble(parts, n_items: int) -> csr_matrix:
+    rows = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, np.int32)
+    cols = np.concatenate([p[1] for p in parts]) if parts else np.empty(0, np.int32)
+    vals = np.concatenate([p[2] for p in parts]) if parts else np.empty(0, np.float32)
+    nn = csr_matrix((vals, (rows, cols)), shape=(n_items, n_items), dtype=np.float32)
+    nn.indices = nn.indices.astype(np.int32)
+    return nn
+
+
+def save_neighbours(path: str | Path, nn: csr_matrix, item_ids) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        path,
+        indptr=nn.indptr.astype(np.int64),
+        indices=nn.indices.astype(np.int32),
+        data=nn.data.astype(np.float32),
+        item_ids=np.asarray(item_ids, dtype=str),
+    )
+
+
+def load_neighbours(path: str | Path) -> tuple[csr_matrix, np.ndarray]:
+    with np.load(path) as z:
+        n_items = z["item_ids"].size
+        nn = csr_matrix(
+            (z["data"], z["indices"], z["indptr"]), shape=(n_items, n_items)
+        )
+        return nn, z["item_ids"]
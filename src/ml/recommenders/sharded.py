@@ -0,0 +1,351 @@
+# project/src/ml/recommenders/sharded.py
+
+"""
+Item-partitioned scoring across shard worker processes (scatter-gather).
+
+The item space [0, n_items) is cut into contiguous ranges; each shard holds
+only the similarities of its candidate items and, for a block of users,
+returns its local top-k over those candidates. The coordinator sends the
+same interaction rows to every shard, then merges the n_shards·k
+candidates per user into the global top-k. Because sim is symmetric,
+score(u, i) = Σ_{j ∈ seen(u)} sim[i, j] only needs row i, so shards never
+talk to each other.
+
+Transport is multiprocessing.connection: pipes for ShardedScorer.spawn()
+(local processes), or sockets via serve_shard() + ShardedScorer.connect()
+(a "host:port" or a unix socket path per shard). Messages are pickles, so
+TCP shards only accept clients that share an authkey (argument, or the
+SHARD_AUTHKEY environment variable); unix sockets rely on file permissions
+and take one if given.
+"""
+
+from __future__ import annotations
+import multiprocessing as mp
+import os
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csr_matrix
+
+from .batch import topk_dense
+
+
+def partition_items(n_items: int, n_shards: int) -> list[tuple[int, int]]:
+    """Contiguous [lo, hi) item ranges of near-equal size."""
+    if not 1 <= n_shards <= max(n_items, 1):
+        raise ValueError(f"n_shards must be in [1, {n_items}], got {n_shards}")
+    bounds = np.linspace(0, n_items, n_shards + 1).round().astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def load_similarity(path: str):
+    """item×item similarity from .npy or a joblib .pkl, memory-mapped when dense."""
+    if str(path).endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    import joblib
+
+    return joblib.load(path, mmap_mode="r")
+
+
+class ItemShard:
+    """Scores candidate items [lo, hi) for blocks of users."""
+
+    def __init__(self, sim, lo: int, hi: int):
+        self.lo, self.hi = lo, hi
+        self.n_items = sim.shape[1]
+        # sim[lo:hi] read as contiguous rows, kept transposed (== sim[:, lo:hi])
+        # so R_rows @ cols needs no per-call copy; only this slice stays resident
+        if sparse.issparse(sim):
+            self.cols = sim.tocsr()[lo:hi].T.tocsr()
+        else:
+            self.cols = np.ascontiguousarray(np.asarray(sim[lo:hi], dtype=np.float32).T)
+
+    def topk(
+        self,
+        R_rows: csr_matrix,
+        k: int = 10,
+        exclude_seen: bool = True,
+        mask: np.ndarray | None = None,
+    ):
+        """-> (top_idx, top_scores), (b × min(k, hi-lo)), item indices global.
+        `mask` covers this shard's items only."""
+        scores = R_rows @ self.cols  # (b × hi-lo)
+        if sparse.issparse(scores):
+            scores = scores.toarray()
+        scores = np.asarray(scores, dtype=np.float32)
+
+        if exclude_seen and R_rows.nnz:
+            rows = np.repeat(np.arange(R_rows.shape[0]), np.diff(R_rows.indptr))
+            mine = (R_rows.indices >= self.lo) & (R_rows.indices < self.hi)
+            scores[rows[mine], R_rows.indices[mine] - self.lo] = -np.inf
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+
+        top, top_scores = topk_dense(scores, k)
+        return top + self.lo, top_scores
+
+    def hello(self) -> tuple:
+        return ("ready", self.lo, self.hi, self.n_items)
+
+
+def _serve(conn: Connection, shard: ItemShard):
+    """Request loop: ("topk", R_rows, k, exclude_seen, mask) → (top_idx, top_scores); None stops."""
+    try:
+        conn.send(shard.hello())
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            _, R_rows, k, exclude_seen, mask = msg
+            try:
+                reply = shard.topk(R_rows, k, exclude_seen, mask)
+            except (
+                Exception
+            ) as e:  # report to the coordinator instead of dying silently
+                reply = e
+            conn.send(reply)
+    except (
+        EOFError,
+        OSError,
+    ):  # the coordinator closed (or gave up on) this connection
+        pass
+    conn.close()
+
+
+def _shard_process(conn: Connection, sim_path: str, lo: int, hi: int):
+    _serve(conn, ItemShard(load_similarity(sim_path), lo, hi))
+
+
+def _parse_address(address: str):
+    host, sep, port = address.rpartition(":")
+    return (host, int(port)) if sep and port.isdigit() else address
+
+
+def _authkey(address, authkey: bytes | None) -> bytes | None:
+    """The authkey for `address`; TCP addresses refuse to run without one."""
+    if authkey is None and os.getenv("SHARD_AUTHKEY"):
+        authkey = os.environ["SHARD_AUTHKEY"].encode("utf-8")
+    if isinstance(address, tuple) and not authkey:
+        raise ValueError(
+            f"TCP shard address {address[0]}:{address[1]} needs an authkey "
+            "(pass authkey= or set SHARD_AUTHKEY)"
+        )
+    return authkey
+
+
+def serve_shard(
+    address: str, sim_path: str, lo: int, hi: int, authkey: bytes | None = None
+):
+    """
+    Run one shard as a socket server ("host:port" or a unix socket path),
+    serving one coordinator connection at a time. Blocks forever.
+    """
+    address = _parse_address(address)
+    authkey = _authkey(address, authkey)
+    shard = ItemShard(load_similarity(sim_path), lo, hi)
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError):  # wrong key or a dropped handshake
+                continue
+            _serve(conn, shard)
+
+
+class ShardedScorer:
+    """
+    Coordinator: same result as batch.topk_for_rows(R_rows, sim, k), computed
+    by the shards in parallel. Calls are serialised (one request in flight
+    per connection); batch users into one call for throughput.
+
+    A shard that errors or doesn't answer within `timeout` seconds has its
+    connection closed (a late reply would otherwise answer the next query)
+    and is reconnected, or respawned, on the next call.
+    """
+
+    def __init__(
+        self,
+        conns: list[Connection],
+        processes: list | None = None,
+        reconnect=None,
+        timeout: float | None = 30.0,
+    ):
+        self._conns = conns
+        self._processes = processes or [None] * len(conns)
+        self._reconnect = reconnect  # shard index → (conn, process or None)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.ranges = []
+        for conn in conns:
+            status, lo, hi, n_items = self._recv(conn, self._deadline())
+            self.ranges.append((lo, hi))
+            self.n_items = n_items
+        covered = sorted(self.ranges)
+        if (
+            covered[0][0] != 0
+            or covered[-1][1] != self.n_items
+            or any(a[1] != b[0] for a, b in zip(covered, covered[1:]))
+        ):
+            self.close()
+            raise ValueError(f"shard ranges {covered} do not cover [0, {self.n_items})")
+
+    @classmethod
+    def spawn(
+        cls,
+        sim_path: str,
+        n_shards: int,
+        context: str = "spawn",
+        timeout: float | None = 30.0,
+    ) -> "ShardedScorer":
+        """Start `n_shards` local worker processes, connected by pipes."""
+        ctx = mp.get_context(context)
+        n_items = load_similarity(sim_path).shape[0]
+        ranges = partition_items(n_items, n_shards)
+
+        def start(i: int):
+            lo, hi = ranges[i]
+            parent, child = ctx.Pipe()
+            p = ctx.Process(
+                target=_shard_process,
+                args=(child, str(sim_path), lo, hi),
+                name=f"item-shard-{lo}-{hi}",
+                daemon=True,
+            )
+            p.start()
+            child.close()
+            return parent, p
+
+        conns, procs = zip(*(start(i) for i in range(n_shards)))
+        return cls(list(conns), list(procs), start, timeout)
+
+    @classmethod
+    def connect(
+        cls,
+        addresses: list[str],
+        authkey: bytes | None = None,
+        timeout: float | None = 30.0,
+    ) -> "ShardedScorer":
+        """Attach to shards already running serve_shard()."""
+        parsed = [_parse_address(a) for a in addresses]
+        keys = [_authkey(a, authkey) for a in parsed]
+
+        def dial(i: int):
+            return Client(parsed[i], authkey=keys[i]), None
+
+        return cls([dial(i)[0] for i in range(len(parsed))], None, dial, timeout)
+
+    def _deadline(self) -> float | None:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    @staticmethod
+    def _recv(conn: Connection, deadline: float | None):
+        if deadline is not None and not conn.poll(
+            max(0.0, deadline - time.monotonic())
+        ):
+            raise TimeoutError("shard did not answer in time")
+        return conn.recv()
+
+    def _drop(self, i: int):
+        """Close shard i's connection (and process): its stream can't be trusted."""
+        conn, p = self._conns[i], self._processes[i]
+        self._conns[i] = self._processes[i] = None
+        if conn is not None:
+            conn.close()
+        if p is not None:
+            p.terminate()
+            p.join(timeout=5)
+
+    def _ensure_connected(self):
+        for i, conn in enumerate(self._conns):
+            if conn is not None:
+                continue
+            if self._reconnect is None:
+                raise ConnectionError(f"shard {i} is disconnected")
+            conn, self._processes[i] = self._reconnect(i)
+            self._conns[i] = conn
+            try:
+                _, lo, hi, _ = self._recv(conn, self._deadline())
+                if (lo, hi) != self.ranges[i]:
+                    raise ConnectionError(
+                        f"shard {i} came back with items [{lo}, {hi}), "
+                        f"expected {list(self.ranges[i])}"
+                    )
+            except BaseException:
+                self._drop(i)
+                raise
+
+    @property
+    def n_shards(self) -> int:
+        return len(self._conns)
+
+    def topk(
+        self,
+        R_rows: csr_matrix,
+        k: int = 10,
+        exclude_seen: bool = True,
+        mask: np.ndarray | None = None,
+    ):
+        """-> (top_idx, top_scores), both (b × k), best first; padding holds -inf.
+        `mask` is a boolean over all items; each shard gets its slice."""
+        R_rows = csr_matrix(R_rows)
+        with self._lock:
+            self._ensure_connected()
+            failures, sent = [], []
+            for i, (lo, hi) in enumerate(self.ranges):  # scatter
+                try:
+                    self._conns[i].send(
+                        (
+                            "topk",
+                            R_rows,
+                            k,
+                            exclude_seen,
+                            None if mask is None else mask[lo:hi],
+                        )
+                    )
+                    sent.append(i)
+                except OSError as e:
+                    failures.append((i, e))
+            parts, deadline = [], self._deadline()
+            for (
+                i
+            ) in sent:  # gather every reply that was asked for, even after a failure
+                try:
+                    parts.append(self._recv(self._conns[i], deadline))
+                except (OSError, EOFError, TimeoutError) as e:
+                    failures.append((i, e))
+            for i, _ in failures:
+                self._drop(i)
+        if failures:
+            i, e = failures[0]
+            raise ConnectionError(
+                f"shard {i} items {list(self.ranges[i])}: {e!r}"
+            ) from e
+        for part in parts:
+            if isinstance(part, Exception):
+                raise part
+
+        idx = np.hstack([p[0] for p in parts])
+        scores = np.hstack([p[1] for p in parts])
+        top, top_scores = topk_dense(scores, k)
+        return np.take_along_axis(idx, top, axis=1), top_scores
+
+    def close(self):
+        for conn in self._conns:
+            if conn is None:
+                continue
+            try:
+                conn.send(None)
+                conn.close()
+            except OSError:
+                pass
+        for p in self._processes:
+            if p is None:
+                continue
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        self._conns, self._processes, self._reconnect = [], [], None
@@ -0,0 +1,130 @@
+# project/src/ml/sentiment/model.py
+
+from __future__ import annotations
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+
+TEXT_COLUMNS = ("review_title", "review_content")
+
+
+def review_text(df: pd.DataFrame) -> pd.Series:
+    """Title + content, the text the model is trained and served on."""
+    return df[list(TEXT_COLUMNS)].fillna("").astype(str).agg(" ".join, axis=1)
+
+
+def weak_labels(
+    reviews: pd.DataFrame, products: pd.DataFrame, pos: float = 4.2, neg: float = 3.9
+) -> pd.DataFrame:
+    """
+    reviews.csv carries no per-review rating, so label each review with its
+    product's average rating: ≥ pos → 1, ≤ neg → 0, the ambiguous middle is dropped.
+    """
+    rating = pd.to_numeric(products.set_index("product_id")["rating"], errors="coerce")
+    df = reviews.assign(rating=reviews["product_id"].map(rating))
+    df = df[(df["rating"] >= pos) | (df["rating"] <= neg)]
+    return df.assign(label=(df["rating"] >= pos).astype(np.int8))
+
+
+class SentimentModel:
+    """
+    Hashed word 1–2-gram features + logistic regression.
+    - fit(texts, labels)
+    - predict_proba(texts) → P(positive): one sparse × dense product per batch
+    - predict(texts) → [{"label", "score"}] through an LRU cache keyed by text hash
+    """
+
+    def __init__(
+        self, n_features: int = 2**20, C: float = 4.0, cache_size: int = 100_000
+    ):
+        self.n_features = n_features
+        self.C = C
+        self.cache_size = cache_size
+        self.coef_ = None  # np.ndarray (n_features,) float32
+        self.intercept_ = 0.0
+        self.vectorizer = HashingVectorizer(
+            n_features=self.n_features,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm="l2",
+            dtype=np.float32,
+        )
+        self._cache: OrderedDict[bytes, float] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def fit(self, texts, labels):
+        X = self.vectorizer.transform(texts)
+        clf = LogisticRegression(C=self.C, class_weight="balanced", max_iter=2000)
+        clf.fit(X, np.asarray(labels))
+        self.coef_ = clf.coef_.ravel().astype(np.float32)
+        self.intercept_ = float(clf.intercept_[0])
+        with self._cache_lock:
+            self._cache.clear()
+        return self
+
+    def predict_proba(self, texts) -> np.ndarray:
+        X = self.vectorizer.transform(texts)
+        logits = X @ self.coef_ + self.intercept_
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def predict(self, texts: list[str]) -> list[dict]:
+        keys = [self._key(t) for t in texts]
+        scores: list[float | None] = [None] * len(texts)
+        with self._cache_lock:
+            for i, k in enumerate(keys):
+                hit = self._cache.get(k)
+                if hit is not None:
+                    self._cache.move_to_end(k)
+                    scores[i] = hit
+
+        # score all cache misses together in one batch
+        miss = [i for i, s in enumerate(scores) if s is None]
+        if miss:
+            probs = self.predict_proba([texts[i] for i in miss])
+            with self._cache_lock:
+                for i, p in zip(miss, probs):
+                    scores[i] = float(p)
+                    self._cache[keys[i]] = scores[i]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return [
+            {
+                "label": "positive" if s >= 0.5 else "negative",
+                "score": s if s >= 0.5 else 1 - s,
+            }
+            for s in scores
+        ]
+
+    # Only plain weights are persisted (no pickled class), so the artifact
+    # loads regardless of how the package was imported at training time.
+    def save(self, path: str | Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(
+            {
+                "n_features": self.n_features,
+                "C": self.C,
+                "coef_": self.coef_,
+                "intercept_": self.intercept_,
+            },
+            path,
+        )
+
+    @classmethod
+    def load(cls, path: str | Path, cache_size: int = 100_000) -> "SentimentModel":
+        state = joblib.load(path)
+        model = cls(n_features=state["n_features"], C=state["C"], cache_size=cache_size)
+        model.coef_ = state["coef_"]
+        model.intercept_ = state["intercept_"]
+        return model
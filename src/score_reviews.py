@@ -0,0 +1,85 @@
+# project/src/score_reviews.py
+
+from __future__ import annotations
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from ml.sentiment.model import SentimentModel, review_text
+
+# Per-worker model, loaded once by _init_worker()
+_MODEL = None
+
+
+def _init_worker(model_path: str):
+    global _MODEL
+    _MODEL = SentimentModel.load(model_path)
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    probs = _MODEL.predict_proba(review_text(chunk).tolist())
+    return pd.DataFrame(
+        {
+            "review_id": chunk["review_id"].to_numpy(),
+            "product_id": chunk["product_id"].to_numpy(),
+            "p_positive": probs.astype("float32"),
+            "label": ["positive" if p >= 0.5 else "negative" for p in probs],
+        }
+    )
+
+
+def _write(scored: pd.DataFrame, fh, n: int, t0: float) -> int:
+    scored.to_csv(fh, header=n == 0, index=False)
+    n += len(scored)
+    print(f"scored {n} reviews | {n / max(time.time() - t0, 1e-9):.0f} reviews/s")
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Score every review with the sentiment model"
+    )
+    ap.add_argument("--reviews", default="data/processed/reviews.csv")
+    ap.add_argument("--model", default="artifacts/sentiment.joblib")
+    ap.add_argument("--out", default="data/processed/review_sentiment.csv")
+    ap.add_argument(
+        "--chunk-size", type=int, default=20_000, help="Reviews per worker task"
+    )
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.tmp")
+
+    t0 = time.time()
+    n = 0
+    chunks = pd.read_csv(
+        args.reviews,
+        usecols=["review_id", "product_id", "review_title", "review_content"],
+        dtype=str,
+        chunksize=args.chunk_size,
+    )
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args.model,)
+    ) as pool, open(tmp, "w", encoding="utf-8", newline="") as fh:
+        # at most 2 chunks per worker in flight → bounded memory, output in input order
+        inflight = deque()
+        for chunk in chunks:
+            inflight.append(pool.submit(_score_chunk, chunk))
+            if len(inflight) >= 2 * args.workers:
+                n = _write(inflight.popleft().result(), fh, n, t0)
+        while inflight:
+            n = _write(inflight.popleft().result(), fh, n, t0)
+
+    os.replace(tmp, out)
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from ml.sentiment.model import SentimentModel
+
+POS = ["great product works well", "excellent quality value for money"]
+NEG = ["stopped working waste of money", "bad quality broke in a week"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    model = SentimentModel(n_features=2**12).fit(POS * 5 + NEG * 5, [1] * 10 + [0] * 10)
+    monkeypatch.setitem(api.state, "model", model)
+    monkeypatch.setitem(api.state, "status", "ready")
+    return TestClient(api.app)
+
+
+def test_predict_returns_503_until_the_model_is_loaded(monkeypatch):
+    monkeypatch.setitem(api.state, "model", None)
+    monkeypatch.setitem(api.state, "status", "loading")
+    client = TestClient(api.app)  # no lifespan: nothing loads in the background
+    r = client.post("/predict", json={"review_content": "great"})
+    assert r.status_code == 503 and "loading" in r.json()["detail"]
+    assert (
+        client.post(
+            "/predict/batch", json={"reviews": [{"review_title": "x"}]}
+        ).status_code
+        == 503
+    )
+    assert client.get("/health/ready").status_code == 503
+
+
+def test_predict_single_and_batch(client):
+    one = client.post(
+        "/predict", json={"review_title": "great", "review_content": "works well"}
+    )
+    assert one.status_code == 200 and one.json()["label"] == "positive"
+
+    reviews = [
+        {"review_content": "broke in a week, waste of money"},
+        {"review_title": "great", "review_content": "works well"},
+        {"review_title": "bad quality"},
+    ]
+    r = client.post("/predict/batch", json={"reviews": reviews})
+    assert r.status_code == 200
+    preds = r.json()["predictions"]
+    assert [p["label"] for p in preds] == ["negative", "positive", "negative"]
+    assert preds[1] == one.json()  # same text, same answer, in request order
+
+
+def test_predict_rejects_empty_and_oversized_input(client):
+    assert client.post("/predict", json={}).status_code == 422
+    assert (
+        client.post(
+            "/predict", json={"review_title": "  ", "review_content": ""}
+        ).status_code
+        == 422
+    )
+    assert client.post("/predict/batch", json={"reviews": []}).status_code == 422
+    too_many = [{"review_content": "ok"}] * 10_001
+    assert client.post("/predict/batch", json={"reviews": too_many}).status_code == 422
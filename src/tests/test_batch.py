@@ -0,0 +1,119 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse import csr_matrix
+
+from batch_score import _prepare_out_dir, main
+from ml.encoders import IdEncoder, StringTable, save_id_artifacts
+from ml.recommenders.batch import topk_for_rows
+
+
+def test_topk_for_rows_matches_per_user_scoring():
+    rng = np.random.default_rng(0)
+    R = csr_matrix((rng.random((20, 30)) < 0.2).astype(np.float32))
+    sim = rng.random((30, 30)).astype(np.float32)
+    sim = (sim + sim.T) / 2
+    np.fill_diagonal(sim, 0.0)
+
+    top, top_scores = topk_for_rows(R, sim, k=5)
+
+    for u in range(R.shape[0]):
+        seen = R[u].indices
+        if seen.size == 0:
+            continue
+        scores = sim[:, seen].sum(axis=1)
+        scores[seen] = -np.inf
+        expected = np.argsort(-scores, kind="stable")[:5]
+        np.testing.assert_allclose(top_scores[u], scores[expected], rtol=1e-5)
+        assert not set(top[u]) & set(seen)
+
+
+def test_no_resume_clears_parts_from_another_layout(tmp_path):
+    old = {"n_users": 10, "k": 5, "shard_size": 2, "format": "csv", "artifacts": {}}
+    new = {**old, "shard_size": 5}
+    _prepare_out_dir(tmp_path, old, resume=True)
+    for s in range(5):
+        (tmp_path / f"part-{s:05d}.csv").write_text("user_id\n")
+
+    with pytest.raises(SystemExit):
+        _prepare_out_dir(tmp_path, new, resume=True)
+    _prepare_out_dir(tmp_path, old, resume=True)  # same layout: parts kept
+    assert len(list(tmp_path.glob("part-*"))) == 5
+
+    _prepare_out_dir(tmp_path, new, resume=False)
+    assert not list(tmp_path.glob("part-*"))
+    assert json.loads((tmp_path / "_manifest.json").read_text()) == new
+
+
+def _artifacts(art, seed=0):
+    rng = np.random.default_rng(seed)
+    dense = rng.random((10, 12)) < 0.3
+    dense[3] = False  # a user without interactions gets no rows
+    R = csr_matrix(dense.astype(np.float32))
+    sim = rng.random((12, 12)).astype(np.float32)
+    sim = (sim + sim.T) / 2
+    np.fill_diagonal(sim, 0.0)
+    joblib.dump(R, art / "user_item_sparse.pkl")
+    joblib.dump(sim, art / "item_item_sim.pkl")
+    items = [f"p{i}" for i in range(12)]
+    save_id_artifacts(
+        art,
+        IdEncoder.from_ids([f"u{i}" for i in range(10)]),
+        IdEncoder.from_ids(items),
+        IdEncoder.from_ids(items),
+        StringTable.from_strings(items),
+    )
+    return R, sim
+
+
+def _run(art, out, fmt="csv"):
+    main(
+        [
+            f"--artifact-dir={art}",
+            f"--out-dir={out}",
+            f"--format={fmt}",
+            "--k=3",
+            "--shard-size=4",
+            "--batch-size=3",
+            "--workers=1",
+        ]
+    )
+    parts = sorted(out.glob(f"part-*.{fmt}"))
+    read = pd.read_csv if fmt == "csv" else pd.read_parquet
+    return parts, pd.concat([read(p) for p in parts])
+
+
+def test_main_scores_shards_and_resumes(tmp_path, capsys):
+    art, out = tmp_path / "art", tmp_path / "recs"
+    art.mkdir()
+    R, sim = _artifacts(art)
+
+    parts, recs = _run(art, out)
+    assert [p.name for p in parts] == [f"part-0000{s}.csv" for s in range(3)]
+    assert "u3" not in set(recs["user_id"])
+    u5 = recs[recs["user_id"] == "u5"]
+    _, expected = topk_for_rows(R[5], sim, k=3)
+    assert u5["rank"].tolist() == [1, 2, 3]
+    np.testing.assert_allclose(u5["score"], expected[0], rtol=1e-5)
+
+    _, pq_recs = _run(art, tmp_path / "recs-pq", "parquet")
+    pd.testing.assert_frame_equal(
+        pq_recs.reset_index(drop=True), recs.reset_index(drop=True), check_dtype=False
+    )
+
+    # resume: only the missing shard is scored again
+    stamps = {p.name: p.stat().st_mtime_ns for p in parts}
+    parts[1].unlink()
+    capsys.readouterr()
+    _run(art, out)
+    assert "3 shards, 2 already done, 1 to score" in capsys.readouterr().out
+    assert parts[0].stat().st_mtime_ns == stamps[parts[0].name]
+
+    # new artifacts: every shard is rescored
+    _artifacts(art, seed=1)
+    _, rescored = _run(art, out)
+    assert "rescoring every shard" in capsys.readouterr().out
+    assert not rescored.reset_index(drop=True).equals(recs.reset_index(drop=True))
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from ml.recommenders.content import blend_similar, content_matrix, product_text
+from ml.recommenders.neighbours import (
+    load_neighbours,
+    save_neighbours,
+    topn_neighbours,
+)
+
+PRODUCTS = pd.DataFrame(
+    {
+        "product_id": ["p0", "p1", "p2", "p3"],
+        "product_name": [
+            "usb c cable",
+            "usb c charging cable",
+            "smart tv remote",
+            "tv remote",
+        ],
+        "about_product": [
+            "braided|fast charging",
+            "fast charging|nylon",
+            "bluetooth",
+            None,
+        ],
+    }
+)
+
+
+def test_blocked_topn_matches_dense_cosine():
+    rng = np.random.default_rng(0)
+    X = csr_matrix(rng.random((40, 30)) * (rng.random((40, 30)) < 0.2))
+    X = csr_matrix(X.multiply(1 / np.maximum(np.sqrt(X.multiply(X).sum(1)), 1e-9)))
+    nn = topn_neighbours(X, n=5, block_size=7, n_jobs=1)
+
+    dense = (X @ X.T).toarray()
+    np.fill_diagonal(dense, 0)
+    for i in range(40):
+        expected = np.sort(dense[i][dense[i] > 0])[::-1][:5]
+        np.testing.assert_allclose(np.sort(nn[i].data)[::-1], expected, rtol=1e-5)
+    assert nn.getnnz(axis=1).max() <= 5
+
+
+def test_content_neighbours_round_trip(tmp_path):
+    X = content_matrix(product_text(PRODUCTS), n_features=2**10, min_df=1, max_df=1.0)
+    nn = topn_neighbours(X, n=2, n_jobs=1)
+    assert nn[0].indices.tolist() == [1]  # the other cable
+    assert set(nn[2].indices) == {3}
+
+    save_neighbours(tmp_path / "nn.npz", nn, PRODUCTS["product_id"])
+    loaded, ids = load_neighbours(tmp_path / "nn.npz")
+    assert ids.tolist() == ["p0", "p1", "p2", "p3"]
+    assert (loaded != nn).nnz == 0
+
+
+def test_blend_covers_products_without_cf():
+    content_nn = csr_matrix(
+        ([0.8, 0.8, 0.5, 0.5], ([0, 1, 2, 3], [1, 0, 3, 2])),
+        shape=(4, 4),
+        dtype=np.float32,
+    )
+    cf_sim = np.array([[0.0, 0.2], [0.2, 0.0]], dtype=np.float32)  # CF knows p0, p2
+    cf_to_content = np.array([0, 2])
+
+    idx, _ = blend_similar(3, None, content_nn, cf_sim, cf_to_content, 0.3, k=5)
+    assert idx.tolist() == [2]  # no reviews, content still answers
+
+    idx, scores = blend_similar(0, 0, content_nn, cf_sim, cf_to_content, 0.5, k=5)
+    assert idx.tolist() == [1, 2]
+    np.testing.assert_allclose(scores, [0.4, 0.1])
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from ml.dedup import (
+    canonicalise,
+    find_duplicates,
+    minhash,
+    near_duplicates,
+    normalise,
+    number_key,
+    shingle_hashes,
+)
+from ml.recommenders.item_item import ItemItemRecommender
+
+
+def _texts(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(2000)])
+    return [" ".join(rng.choice(words, 40)) for _ in range(n)]
+
+
+def _jaccard(a, b, k=5):
+    sa = {a[i : i + k] for i in range(len(a) - k + 1)}
+    sb = {b[i : i + k] for i in range(len(b) - k + 1)}
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_signature_agreement_estimates_jaccard():
+    a = normalise(_texts(1))[0]
+    b = a[:-30] + " something else entirely"
+    h, offsets = shingle_hashes(normalise([a, b, "ab"]))
+    assert np.diff(offsets).tolist() == [len(a) - 4, len(b) - 4, 1]
+
+    sig = minhash([a, b, "", None], num_perm=256)
+    assert abs((sig[0] == sig[1]).mean() - _jaccard(a, b)) < 0.1
+    assert (sig[2] == sig[3]).all()  # empty rows share the EMPTY signature ...
+    i, j, _ = near_duplicates(sig, bands=64, threshold=0.5)
+    assert (i.tolist(), j.tolist()) == ([0], [1])  # ... but are never matched
+
+
+def test_find_duplicates_streams_and_picks_canonical(tmp_path):
+    texts = _texts()
+    df = pd.DataFrame(
+        {"id": [f"P{i}" for i in range(len(texts))], "text": texts, "n": "1"}
+    )
+    # near-copies: punctuation/case changes and a tweaked tail
+    copies = df.iloc[[3, 3, 10]].assign(id=["D1", "D2", "D3"], n=["5,000", "2", ""])
+    copies["text"] = copies["text"].str.upper().str.replace(" ", ", ") + " extra"
+    df = pd.concat([df, copies], ignore_index=True)
+
+    chunks = (df.iloc[lo : lo + 64] for lo in range(0, len(df), 64))
+    mapping = find_duplicates(
+        chunks, "id", ["text"], priority_col="n", sig_path=tmp_path / "sig.bin"
+    )
+    assert dict(mapping.itertuples(index=False)) == {
+        "P3": "D1",
+        "D2": "D1",
+        "D3": "P10",
+    }
+    assert find_duplicates([df], "id", ["text"], priority_col="n").equals(mapping)
+
+    ids = pd.Series(["P3", "P4", "D3"])
+    assert canonicalise(ids, mapping).tolist() == ["D1", "P4", "P10"]
+
+
+def test_size_and_price_variants_are_not_merged():
+    about = " ".join(_texts(20, seed=3))  # a long shared description
+    df = pd.DataFrame(
+        {
+            "id": ["TV32", "TV43", "TV32-red", "TV32-sale"],
+            "name": [
+                "OnePlus 80 cm (32 inches) Y Series HD Ready Smart LED TV 32 Y1S (Black)",
+                "OnePlus 108 cm (43 inches) Y Series HD Ready Smart LED TV 43 Y1S (Black)",
+                "OnePlus 80 cm (32 inches) Y Series HD Ready Smart LED TV 32 Y1S (Red)",
+                "OnePlus 80 cm (32 inches) Y Series HD Ready Smart LED TV 32 Y1S (Black)",
+            ],
+            "about": about,
+            "price": ["₹21,999", "₹31,999", "₹21,999", "₹24,999"],
+        }
+    )
+    assert number_key(df["price"]).tolist()[:2] == ["21999", "31999"]
+    assert len(find_duplicates([df], "id", ["name", "about"])) == 3  # text alone
+    mapping = find_duplicates(
+        [df], "id", ["name", "about"], match_cols=["name", "price"]
+    )
+    assert dict(mapping.itertuples(index=False)) == {"TV32-red": "TV32"}
+
+
+def test_recommender_folds_duplicate_listings(tmp_path):
+    pd.DataFrame(
+        {
+            "product_id": ["A", "A2", "B", "C"],
+            "product_name": [
+                "usb cable",
+                "usb cable 1m",
+                "phone charger",
+                "hdmi cable",
+            ],
+            "about_product": ["braided usb c cable"] * 2 + ["fast charger", "4k hdmi"],
+        }
+    ).to_csv(tmp_path / "products.csv", index=False)
+    pd.DataFrame(
+        {
+            "user_id": ["u1", "u1", "u2", "u2", "u3", "u3"],
+            "product_id": ["A", "B", "A2", "B", "C", "A2"],
+        }
+    ).to_csv(tmp_path / "reviews.csv", index=False)
+    pd.DataFrame({"product_id": ["A2"], "canonical_id": ["A"]}).to_csv(
+        tmp_path / "product_canonical.csv", index=False
+    )
+
+    rec = ItemItemRecommender(tmp_path).fit()
+    assert sorted(rec.item2idx.decode(np.arange(len(rec.item2idx)))) == ["A", "B", "C"]
+    assert rec.R.shape == (3, 3)
+    assert rec.similar_items("A2", k=5) == rec.similar_items("A", k=5)
+
+    rec.fit_content(n_neighbours=3, content_weight=0.5, n_jobs=1)
+    assert "A2" not in [r["product_id"] for r in rec.similar_items("A", k=5)]
+    assert "A" not in [r["product_id"] for r in rec.similar_items("A2", k=5)]
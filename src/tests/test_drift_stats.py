@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from monitoring.drift_stats import DriftMonitor, ReferenceProfile, drift_scores
+
+
+def _frame(n, seed, shift=0.0, words=("good", "product", "value", "money")):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "price": rng.normal(100 + shift, 10, n),
+            "category": rng.choice(["cables", "phones", "audio"], n),
+            "review": [" ".join(rng.choice(words, 6)) for _ in range(n)],
+            "review_id": [f"R{seed}-{i}" for i in range(n)],
+            "product_id": rng.choice(
+                [f"P{i}" for i in range(n // 2)], n
+            ),  # repeats, but an ID
+        }
+    )
+
+
+def test_schema_skips_id_columns_and_profiles_the_rest():
+    ref = ReferenceProfile.from_frame(_frame(500, 0))
+    kinds = {c: spec.kind for c, spec in ref.schema.columns.items()}
+    assert kinds == {"price": "numeric", "category": "categorical", "review": "text"}
+
+
+def test_window_matches_full_recount_and_rolls_off_old_batches():
+    ref = ReferenceProfile.from_frame(_frame(2000, 0))
+    monitor = DriftMonitor(ref, max_batches=2)
+    batches = [_frame(300, s) for s in (1, 2, 3)]
+    for b in batches:
+        monitor.update(b)
+
+    expected = ref.schema.count(pd.concat(batches[1:]))
+    counts = monitor.current_counts()
+    assert counts.keys() == expected.keys()
+    for key, vec in expected.items():
+        np.testing.assert_array_equal(counts[key], vec)
+
+    summary = monitor.summary()
+    assert summary["current_rows"] == 600
+    recount = drift_scores(ref.counts, expected, ref.thresholds(600))
+    assert summary["columns"] == recount["columns"]
+
+
+def test_iid_halves_with_sparse_text_do_not_drift():
+    # large vocabulary: sparse token buckets have a big JS distance even without drift
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(3000)]
+    df = pd.DataFrame(
+        {
+            "title": [" ".join(rng.choice(words, 4)) for _ in range(4000)],
+            "category": rng.choice([f"c{i}" for i in range(150)], 4000),
+        }
+    )
+    flagged = 0
+    for seed in range(5):
+        shuffled = df.sample(frac=1, random_state=seed)
+        monitor = DriftMonitor(ReferenceProfile.from_frame(shuffled.iloc[:2000]))
+        monitor.update(shuffled.iloc[2000:])
+        summary = monitor.summary()
+        assert (
+            summary["columns"]["title"]["stats"]["tokens"] > 0.1
+        )  # the old fixed cut-off
+        flagged += summary["dataset_drift"]
+    assert flagged == 0
+
+
+def test_shifted_window_is_flagged():
+    ref = ReferenceProfile.from_frame(_frame(2000, 0))
+    monitor = DriftMonitor(ref)
+    monitor.update(_frame(1000, 1))
+    assert not monitor.summary()["columns"]["price"]["drift_detected"]
+
+    monitor.reset()
+    monitor.update(
+        _frame(1000, 2, shift=30, words=("broken", "refund", "bad", "waste"))
+    )
+    summary = monitor.summary()
+    assert summary["columns"]["price"]["drift_detected"]
+    assert summary["columns"]["review"]["stats"]["tokens"] > 0.5
+    assert summary["dataset_drift"]
+
+
+def test_reference_profile_is_cached(tmp_path):
+    csv = tmp_path / "ref.csv"
+    _frame(200, 0).to_csv(csv, index=False)
+    first = ReferenceProfile.load(csv, tmp_path / "cache")
+    assert len(list((tmp_path / "cache").glob("*.pkl"))) == 1
+    second = ReferenceProfile.load(csv, tmp_path / "cache")
+    assert second.n_rows == first.n_rows == 200
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from ml.encoders import IdEncoder, StringTable
+
+
+def test_encode_decode_round_trip_keeps_insertion_order():
+    ids = ["u3", "u1", "é2", "u10"]
+    enc = IdEncoder.from_ids(ids)
+    assert enc.encode(ids).tolist() == [0, 1, 2, 3]
+    assert enc.encode(["u10", "nope"]).tolist() == [3, -1]
+    assert enc.decode([2, 0]).tolist() == ["é2", "u3"]
+    assert enc["u1"] == 1 and "u1" in enc and enc.get("nope") is None
+    with pytest.raises(ValueError):
+        IdEncoder.from_ids(["a", "a"])
+
+
+def test_runtime_ids_take_next_index():
+    enc = IdEncoder.from_ids(["a", "b"])
+    assert enc.add("new") == 2
+    assert len(enc) == 3
+    assert enc.encode(["b", "new", "x"]).tolist() == [1, 2, -1]
+    assert enc.decode([2, 0]).tolist() == ["new", "a"]
+
+
+def test_save_load_memory_mapped(tmp_path):
+    enc = IdEncoder.from_ids(np.array(["p2", "p1", "p3"]))
+    enc.save(tmp_path / "items")
+    names = StringTable.from_strings(["Cable", "", "Écran 24″"])
+    names.save(tmp_path / "names")
+
+    loaded = IdEncoder.load(tmp_path / "items")
+    assert isinstance(loaded._keys, np.memmap)
+    assert loaded.encode(["p3", "p2"]).tolist() == [2, 0]
+    table = StringTable.load(tmp_path / "names")
+    assert [table[i] for i in range(len(table))] == ["Cable", "", "Écran 24″"]
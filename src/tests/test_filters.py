@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from app.engine import RecommenderEngine
+from ml.recommenders.batch import topk_for_rows
+from ml.recommenders.filters import FilterIndex
+
+
+def _products(n=200):
+    rng = np.random.default_rng(0)
+    cats = np.array(["Electronics|Cables", "Electronics|Audio", "Home&Kitchen|Kettles"])
+    return pd.DataFrame(
+        {
+            "product_id": [f"P{i:04d}" for i in range(n)],
+            "category": cats[rng.integers(0, 3, n)],
+            "discounted_price": [f"₹{p:,.2f}" for p in rng.uniform(50, 5000, n)],
+            "rating": rng.choice(["3.5", "3.9", "4.0", "4.4", ""], n),
+            "rating_count": [f"{c:,}" for c in rng.integers(1, 50_000, n)],
+        }
+    )
+
+
+def test_mask_matches_direct_filtering():
+    products = _products()
+    extra = pd.DataFrame(
+        {"product_id": ["P0000", "P0001"], "category": ["Deals", "Deals"]}
+    )
+    index = FilterIndex.from_products(products, extra)
+
+    price = (
+        products["discounted_price"].str.replace(r"[₹,]", "", regex=True).astype(float)
+    )
+    rating = pd.to_numeric(products["rating"], errors="coerce")
+    in_cat = products["category"].str.contains("Cables|Audio")
+    expected = in_cat & price.between(120.5, 999.99) & (rating >= 4.0)
+
+    mask = index.mask(
+        ["cables", "Audio"], min_price=120.5, max_price=999.99, min_rating=4.0
+    )
+    assert (mask == expected.to_numpy()).all()
+    assert index.mask(["Deals"]).nonzero()[0].tolist() == [0, 1]
+    assert index.mask() is None
+    assert not index.mask(["Unknown"]).any()
+
+
+def test_take_and_save_round_trip(tmp_path):
+    index = FilterIndex.from_products(_products())
+    index.save(tmp_path / "filters.npz")
+    loaded = FilterIndex.load(tmp_path / "filters.npz").take([5, -1, 7])
+    full = index.mask(["Electronics"], max_price=2500)
+    assert loaded.mask(["Electronics"], max_price=2500).tolist() == [
+        full[5],
+        False,
+        full[7],
+    ]
+
+
+def test_mask_applied_before_topk():
+    rng = np.random.default_rng(1)
+    R = csr_matrix((rng.random((10, 30)) < 0.2).astype(np.float32))
+    sim = rng.random((30, 30)).astype(np.float32)
+    mask = np.zeros(30, dtype=bool)
+    mask[::3] = True
+
+    top, scores = topk_for_rows(R, sim, k=4, mask=mask)
+    assert mask[top[np.isfinite(scores)]].all()
+    assert np.isfinite(scores).sum(axis=1).min() > 0
+
+
+def test_zero_bounds_are_filters_and_empty_categories_are_not():
+    index = FilterIndex.from_products(_products())
+    unset = dict.fromkeys(["categories", "min_price", "max_price", "min_rating"])
+
+    mask = RecommenderEngine._mask(index, {**unset, "max_price": 0})
+    assert mask is not None and not mask.any()  # nothing costs ≤ ₹0
+    rated = RecommenderEngine._mask(index, {**unset, "min_rating": 0})
+    assert rated is not None and rated.sum() == (_products()["rating"] != "").sum()
+
+    assert RecommenderEngine._mask(index, {**unset, "categories": []}) is None
+    assert RecommenderEngine._mask(None, unset) is None
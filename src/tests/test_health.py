@@ -8,3 +8,77 @@ def test_health():
     r = client.get("/health")
     assert r.status_code == 200
     assert r.json() == {"status": "ok"}
+
+
+class _StubEngine:
+    class FilterError(ValueError):
+        pass
+
+    def recommend_for_user(self, user_id, k, exclude_seen, filters):
+        if filters["min_price"] is not None:
+            raise self.FilterError("Filters are unavailable")
+        raise ValueError("kth(=-3750) out of bounds (1250)")  # an internal numpy error
+
+
+def test_recommend_validates_k_and_maps_only_filter_errors_to_400(monkeypatch):
+    from app import main
+
+    monkeypatch.setitem(main.state, "engine", _StubEngine())
+    api = TestClient(app, raise_server_exceptions=False)
+    assert api.get("/recommend/u1", params={"k": 5000}).status_code == 422
+    assert api.get("/recommend/u1", params={"k": 0}).status_code == 422
+    r = api.get("/recommend/u1", params={"min_price": 10})
+    assert r.status_code == 400 and r.json()["detail"] == "Filters are unavailable"
+    r = api.get("/recommend/u1")
+    assert r.status_code == 500 and "kth" not in r.text
+
+
+def test_similar_rejects_nan_and_out_of_range_content_weight(monkeypatch):
+    from app import main
+
+    class Engine(_StubEngine):
+        def similar_products(self, product_id, k, content_weight, filters):
+            return [{"product_id": "p1", "content_weight": content_weight}]
+
+    monkeypatch.setitem(main.state, "engine", Engine())
+    api = TestClient(app)
+    for bad in ("nan", "-0.1", "1.5"):
+        r = api.get("/similar/p0", params={"content_weight": bad})
+        assert r.status_code == 422, bad
+    r = api.get("/similar/p0", params={"content_weight": 1})
+    assert r.json()[0]["content_weight"] == 1.0
+
+
+def test_events_are_throttled_with_429_when_the_overlay_is_full(monkeypatch):
+    import threading
+
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    from app import main
+    from app.engine import RecommenderEngine
+    from ml.encoders import IdEncoder
+    from ml.recommenders.interactions import InteractionStore
+
+    engine = object.__new__(RecommenderEngine)
+    engine.user2idx = IdEncoder.from_ids(["u0"])
+    engine.prod2idx = IdEncoder.from_ids(["p0", "p1", "p2"])
+    engine.canonical = {}
+    engine._user_lock = threading.Lock()
+    engine.interaction_store = InteractionStore(
+        csr_matrix((1, 3), dtype=np.float32), max_overlay=2, max_new_users=1
+    )
+    engine.interaction_store.compact = lambda block=True: False
+    monkeypatch.setitem(main.state, "engine", engine)
+    api = TestClient(app)
+
+    def post(*pairs):
+        events = [{"user_id": u, "product_id": p} for u, p in pairs]
+        return api.post("/events", json={"events": events})
+
+    r = post(("u0", "p0"), ("new1", "p1"), ("new2", "p1"))  # a second new user
+    assert r.status_code == 429 and r.headers["Retry-After"]
+    assert r.json()["detail"]["accepted"] == 2 and r.json()["detail"]["throttled"] == 1
+    assert post(("u0", "p2")).status_code == 429  # overlay holds 2 pairs
+    assert post(("u0", "p0")).json()["duplicate"] == 1
+    assert post(*[("u0", "p0")] * (main.MAX_EVENTS + 1)).status_code == 422
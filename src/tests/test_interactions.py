@@ -0,0 +1,104 @@
+import threading
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+import pytest
+
+from ml.recommenders.interactions import CapacityError, InteractionStore
+
+
+def _base():
+    # 2 users × 4 items
+    return csr_matrix(np.array([[1, 0, 1, 0], [0, 1, 0, 0]], dtype=np.float32))
+
+
+def test_overlay_merges_with_base_row():
+    store = InteractionStore(_base())
+    assert store.add(0, 3)
+    assert not store.add(0, 2)  # already in base
+    assert not store.add(0, 3)  # already in overlay
+    assert store.seen(0).tolist() == [0, 2, 3]
+    assert store.matrix[0, 3] == 0  # base untouched until compaction
+
+
+def test_compaction_folds_overlay_and_new_users():
+    store = InteractionStore(_base())
+    u = store.add_user()
+    store.add(u, 1)
+    store.add(1, 0)
+    assert store.compact()
+    assert store.pending == 0
+    assert store.matrix.shape == (3, 4)
+    assert store.seen(u).tolist() == [1]
+    assert store.seen(1).tolist() == [0, 1]
+
+
+def test_max_pending_bounds_overlay():
+    store = InteractionStore(_base(), max_pending=2)
+    store.add(1, 2)
+    store.add(1, 3)
+    assert store.wait_for_compaction(timeout=5)
+    assert store.pending == 0
+    assert store.matrix[1].indices.tolist() == [1, 2, 3]
+
+
+def test_threshold_compaction_runs_off_the_request_thread():
+    store = InteractionStore(_base(), max_pending=1)
+    started, release = threading.Event(), threading.Event()
+    merge = store._merge
+
+    def slow_merge(*args):
+        started.set()
+        release.wait(5)
+        return merge(*args)
+
+    store._merge = slow_merge
+    t0 = time.monotonic()
+    assert store.add(0, 1)  # crosses the threshold: compaction starts in the background
+    assert started.wait(5)
+    assert store.add(1, 3)  # not blocked by the running rebuild
+    assert time.monotonic() - t0 < 1
+    assert store.seen(0).tolist() == [0, 1, 2]  # frozen overlay still visible
+
+    release.set()
+    assert store.wait_for_compaction(timeout=5)
+    assert store.matrix[0].indices.tolist() == [0, 1, 2]
+
+
+def test_concurrent_adds_and_reads():
+    store = InteractionStore(csr_matrix((50, 200), dtype=np.float32), max_pending=64)
+
+    def writer(u):
+        for i in range(200):
+            while True:
+                try:
+                    store.add(u, i)
+                    break
+                except CapacityError:  # overlay full: wait for the rebuild
+                    store.wait_for_compaction(timeout=5)
+            store.seen(u)
+
+    threads = [threading.Thread(target=writer, args=(u,)) for u in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for u in range(8):
+        assert store.seen(u).size == 200
+
+
+def test_overlay_and_new_users_are_hard_capped():
+    store = InteractionStore(_base(), max_pending=100, max_overlay=2, max_new_users=1)
+    store.compact = lambda block=True: False  # a rebuild that never finishes
+    assert store.add(0, 1) and store.add(0, 3)
+    with pytest.raises(CapacityError):
+        store.add(1, 0)
+    assert store.pending == 2 and store.seen(1).tolist() == [1]
+    assert not store.add(0, 1)  # duplicates are still recognised when full
+
+    store.add_user()
+    with pytest.raises(CapacityError):
+        store.add_user()
+    assert store.n_users == 3
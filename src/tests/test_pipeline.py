@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.metrics.pairwise import cosine_similarity
+
+from ml.pipeline import Input, Stage, Store, run_pipeline
+from ml.recommenders.cooccurrence import cooccurrence, cosine_from_cooccurrence
+
+
+def _count_ids(ctx):
+    df = pd.read_csv(ctx.inputs["data"], dtype=str)
+    (ctx.out / "n_ids.txt").write_text(str(df["id"].nunique()))
+
+
+def _double(ctx):
+    n = int((ctx.deps["count"] / "n_ids.txt").read_text())
+    (ctx.out / "double.txt").write_text(str(2 * n))
+
+
+def _cache_ids(ctx):
+    ids = pd.read_csv(ctx.inputs["data"], dtype=str)["id"]
+    blob = ctx.blobs / "ids" / f"{len(ids)}.txt"
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    blob.write_text(",".join(ids))
+    ctx.record_blobs([blob])
+    (ctx.out / "ids.txt").write_text(blob.read_text())
+
+
+def _names(ctx):
+    # reads a column the key doesn't cover, so only --force picks up edits to it
+    df = pd.read_csv(ctx.inputs["data"], dtype=str)
+    (ctx.out / "names.txt").write_text(",".join(df["name"]))
+
+
+def _stages(path):
+    return [
+        Stage("count", _count_ids, inputs={"data": Input(str(path), ["id"])}),
+        Stage("double", _double, deps=["count"]),
+    ]
+
+
+def test_unchanged_inputs_are_skipped(tmp_path):
+    data = tmp_path / "data.csv"
+    pd.DataFrame({"id": ["a", "b", "b"], "name": ["x", "y", "z"]}).to_csv(
+        data, index=False
+    )
+    store, out = Store(tmp_path / "store"), tmp_path / "out"
+
+    first = run_pipeline(_stages(data), out, store, log=lambda _: None)
+    assert [r.cached for r in first] == [False, False]
+    assert (out / "double.txt").read_text() == "4"
+
+    # a column the stage doesn't read: nothing reruns
+    pd.DataFrame({"id": ["a", "b", "b"], "name": ["x", "y", "new"]}).to_csv(
+        data, index=False
+    )
+    second = run_pipeline(_stages(data), out, store, log=lambda _: None)
+    assert all(r.cached for r in second)
+
+    # same output despite new rows: the downstream stage keeps its key
+    pd.DataFrame({"id": ["a", "b", "a"], "name": ["x", "y", "z"]}).to_csv(
+        data, index=False
+    )
+    third = {
+        r.name: r.cached
+        for r in run_pipeline(_stages(data), out, store, log=lambda _: None)
+    }
+    assert third == {"count": False, "double": True}
+
+
+def test_gc_drops_stale_objects_and_unreferenced_blobs(tmp_path):
+    data = tmp_path / "data.csv"
+    store, out = Store(tmp_path / "store"), tmp_path / "out"
+    stages = [Stage("ids", _cache_ids, inputs={"data": Input(str(data), ["id"])})]
+
+    pd.DataFrame({"id": ["a", "b"]}).to_csv(data, index=False)
+    run_pipeline(stages, out, store, log=lambda _: None)
+    pd.DataFrame({"id": ["a", "b", "c"]}).to_csv(data, index=False)
+    live = run_pipeline(stages, out, store, log=lambda _: None)
+
+    assert sorted(p.name for p in (store.blobs / "ids").iterdir()) == ["2.txt", "3.txt"]
+    assert store.gc({r.key for r in live}) == (1, 1)
+    assert [p.name for p in (store.blobs / "ids").iterdir()] == ["3.txt"]
+    assert not (out / "_blobs").exists()  # bookkeeping never reaches the artifacts
+    assert store.gc({r.key for r in live}) == (0, 0)
+
+
+def test_forced_rebuild_replaces_the_cached_object(tmp_path):
+    data = tmp_path / "data.csv"
+    store, out = Store(tmp_path / "store"), tmp_path / "out"
+    stages = [Stage("names", _names, inputs={"data": Input(str(data), ["id"])})]
+
+    pd.DataFrame({"id": ["a"], "name": ["v1"]}).to_csv(data, index=False)
+    first = run_pipeline(stages, out, store, log=lambda _: None)
+    pd.DataFrame({"id": ["a"], "name": ["v2"]}).to_csv(data, index=False)
+    assert run_pipeline(stages, out, store, log=lambda _: None)[0].cached
+    assert (out / "names.txt").read_text() == "v1"
+
+    forced = run_pipeline(stages, out, store, force={"names"}, log=lambda _: None)
+    assert forced[0].key == first[0].key and not forced[0].cached
+    assert (out / "names.txt").read_text() == "v2"
+    assert (store.object_dir(first[0].key) / "names.txt").read_text() == "v2"
+    assert not any((store.objects / "tmp").iterdir())
+
+
+def test_partial_gc_keeps_skipped_stages_and_sweeps_staging(tmp_path):
+    data = tmp_path / "data.csv"
+    store, out = Store(tmp_path / "store"), tmp_path / "out"
+    pd.DataFrame({"id": ["a", "b"], "name": ["x", "y"]}).to_csv(data, index=False)
+    run_pipeline(_stages(data), out, store, log=lambda _: None)
+    pd.DataFrame({"id": ["a", "b", "c"], "name": ["x", "y", "z"]}).to_csv(
+        data, index=False
+    )
+    run_pipeline(_stages(data), out, store, log=lambda _: None)
+    store.staging_dir("crashed")  # left behind by a stage that raised
+
+    # only "count" ran: its stale object goes, both "double" objects stay
+    live = run_pipeline(_stages(data)[:1], out, store, log=lambda _: None)
+    assert store.gc({r.key for r in live}, stages={"count"}) == (2, 0)
+    assert len(list(store.objects.glob("??/*"))) == 3
+    assert not any((store.objects / "tmp").iterdir())
+
+
+def test_cooccurrence_slabs_match_cosine_and_are_reused(tmp_path):
+    rng = np.random.default_rng(0)
+    R = csr_matrix((rng.random((60, 50)) < 0.1).astype(np.float32))
+    expected = cosine_similarity(R.T)
+    np.fill_diagonal(expected, 0.0)
+
+    C, stats = cooccurrence(R, block_size=8, cache_dir=tmp_path)
+    np.testing.assert_allclose(cosine_from_cooccurrence(C), expected, atol=1e-6)
+    assert stats["reused"] == 0
+
+    R = R.tolil()
+    R[0, 0] = 1.0 if R[0, 0] == 0 else 0.0  # one changed interaction
+    C2, stats = cooccurrence(R.tocsr(), block_size=8, cache_dir=tmp_path)
+    assert 0 < stats["reused"] < stats["slabs"]
+    np.testing.assert_allclose(C2.toarray(), (R.T @ R).toarray())
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from ml.sentiment.model import SentimentModel, review_text, weak_labels
+
+POS = ["great product works well", "excellent quality value for money", "good and fast"]
+NEG = ["stopped working waste of money", "bad quality broke in a week", "poor and slow"]
+
+
+def _model():
+    return SentimentModel(n_features=2**12, cache_size=4).fit(
+        POS * 5 + NEG * 5, [1] * 15 + [0] * 15
+    )
+
+
+def test_batch_predictions_and_cache():
+    model = _model()
+    out = model.predict(["great quality", "broke, waste of money", "great quality"])
+    assert [o["label"] for o in out] == ["positive", "negative", "positive"]
+    assert out[0] == out[2]
+    assert len(model._cache) == 2
+
+    model.predict([f"text {i}" for i in range(10)])
+    assert len(model._cache) == 4  # LRU bounded
+
+
+def test_save_load_roundtrip(tmp_path):
+    model = _model()
+    model.save(tmp_path / "sentiment.joblib")
+    loaded = SentimentModel.load(tmp_path / "sentiment.joblib")
+    assert (loaded.predict_proba(POS + NEG) == model.predict_proba(POS + NEG)).all()
+
+
+def test_weak_labels_drop_ambiguous_ratings():
+    reviews = pd.DataFrame(
+        {
+            "product_id": ["a", "b", "c"],
+            "review_title": ["x", None, "z"],
+            "review_content": "y",
+        }
+    )
+    products = pd.DataFrame(
+        {"product_id": ["a", "b", "c"], "rating": ["4.5", "4.0", "3.1"]}
+    )
+    df = weak_labels(reviews, products)
+    assert df["product_id"].tolist() == ["a", "c"]
+    assert df["label"].tolist() == [1, 0]
+    assert review_text(df).tolist() == ["x y", "z y"]
@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+
+from ml.serving_log import ServingLog, read_batch
+from monitoring.serving_drift import ServingDriftMonitor, gini
+
+
+def test_ring_drains_published_records_and_counts_overwrites(tmp_path):
+    log = ServingLog(tmp_path, n_items=50, capacity=8)
+    for u in range(3):
+        log.record(u, np.array([1, 2, 3]), np.array([0.9, 0.5, 0.1], dtype=np.float32))
+    batch = log.drain()
+    assert batch["user"].tolist() == [0, 1, 2]
+    assert batch["items"][0, :3].tolist() == [1, 2, 3]
+    assert log.drain().size == 0
+
+    for u in range(20):  # laps the 8-slot ring before the next drain
+        log.record(u, np.array([4]), np.array([0.2], dtype=np.float32))
+    batch = log.drain()
+    assert batch["user"].tolist() == list(range(12, 20))
+    assert log.dropped == 12
+
+
+class _LapDuringScan(list):
+    """Ring whose first read lets a writer lap it mid-drain."""
+
+    on_read = None
+
+    def __getitem__(self, key):
+        hook, type(self).on_read = type(self).on_read, None
+        if hook is not None:
+            hook()
+        return super().__getitem__(key)
+
+
+def test_drain_drops_records_overwritten_during_the_scan(tmp_path):
+    log = ServingLog(tmp_path, n_items=50, capacity=4)
+    for u in range(3):  # seq 1..3 → slots 1..3
+        log.record(u, np.array([u]), np.array([1.0], dtype=np.float32))
+
+    def lap():  # seq 4, 5 → slots 0, 1: seq 1's slot is rewritten as it is read
+        for u in (10, 11):
+            log.record(u, np.array([u]), np.array([1.0], dtype=np.float32))
+
+    log._ring = _LapDuringScan(log._ring)
+    _LapDuringScan.on_read = lap
+    batch = log.drain()
+    assert batch["user"].tolist() == [1, 2, 10, 11]
+    assert batch["items"][:, 0].tolist() == [1, 2, 10, 11]  # never a torn record
+    assert log.dropped == 1
+    assert log.drain().size == 0
+
+
+def test_record_stays_within_a_few_microseconds(tmp_path):
+    log = ServingLog(tmp_path, n_items=100, capacity=4096)
+    items = np.arange(10)
+    scores = np.linspace(1, 0, 10)
+    n = 20_000
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for u in range(n):
+            log.record(u, items, scores)
+        best = min(best, (time.perf_counter() - t0) / n)
+    assert best < 3e-6, f"record() took {best * 1e6:.2f} µs per call"
+
+
+def test_sampling_rate_zero_records_nothing(tmp_path):
+    log = ServingLog(tmp_path, n_items=5, sample_rate=0.0)
+    log.record(0, np.array([1]), np.array([1.0], dtype=np.float32))
+    assert log.flush() is None
+
+
+def test_drift_monitor_consumes_flushed_batches(tmp_path):
+    log = ServingLog(tmp_path, n_items=100)
+    rng = np.random.default_rng(0)
+    for u in range(200):  # baseline: broad recommendations, low scores
+        log.record(
+            u, rng.choice(100, 10, replace=False), rng.random(10).astype(np.float32)
+        )
+    path = log.flush()
+    records, n_items = read_batch(path)
+    assert len(records) == 200 and n_items == 100
+
+    for u in range(200):  # current: everything points at 3 items with high scores
+        log.record(u, np.array([0, 1, 2]), np.full(3, 50.0, dtype=np.float32))
+    log.flush()
+
+    monitor = ServingDriftMonitor(tmp_path, baseline_records=200)
+    assert monitor.poll() == 2
+    assert monitor.poll() == 0
+    summary = monitor.summary()
+    assert summary["baseline"]["coverage"] > 0.9
+    assert summary["current"]["coverage"] == 0.03
+    assert summary["current"]["gini"] > summary["baseline"]["gini"]
+    assert summary["score_drift_js"] > 0.9
+
+
+def test_gini_bounds():
+    assert gini(np.ones(10)) == 0.0
+    assert gini(np.array([0] * 9 + [5])) > 0.85
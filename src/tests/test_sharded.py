@@ -0,0 +1,119 @@
+import multiprocessing as mp
+import threading
+import time
+
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from ml.recommenders.batch import topk_for_rows
+from ml.recommenders.sharded import (
+    ItemShard,
+    ShardedScorer,
+    _serve,
+    partition_items,
+    serve_shard,
+)
+
+
+def _problem(n_users=25, n_items=40):
+    rng = np.random.default_rng(1)
+    R = csr_matrix((rng.random((n_users, n_items)) < 0.15).astype(np.float32))
+    sim = rng.random((n_items, n_items)).astype(np.float32)
+    sim = (sim + sim.T) / 2
+    np.fill_diagonal(sim, 0.0)
+    return R, sim
+
+
+def test_partition_covers_items():
+    ranges = partition_items(10, 3)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 10
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_shard_merge_matches_single_process():
+    R, sim = _problem()
+    _, expected_scores = topk_for_rows(R, sim, k=5)
+
+    parts = [ItemShard(sim, lo, hi).topk(R, k=5) for lo, hi in partition_items(40, 3)]
+    scores = np.hstack([p[1] for p in parts])
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :5]
+    np.testing.assert_allclose(
+        np.take_along_axis(scores, order, axis=1), expected_scores
+    )
+
+
+def test_shards_apply_their_slice_of_the_mask():
+    R, sim = _problem()
+    mask = np.arange(40) % 4 == 0
+    _, expected_scores = topk_for_rows(R, sim, k=3, mask=mask)
+
+    parts = [
+        ItemShard(sim, lo, hi).topk(R, 3, True, mask[lo:hi])
+        for lo, hi in partition_items(40, 3)
+    ]
+    idx = np.hstack([p[0] for p in parts])
+    scores = np.hstack([p[1] for p in parts])
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :3]
+    np.testing.assert_allclose(
+        np.take_along_axis(scores, order, axis=1), expected_scores
+    )
+    assert mask[idx[np.isfinite(scores)]].all()
+
+
+def test_scatter_gather_over_pipes(tmp_path):
+    R, sim = _problem()
+    np.save(tmp_path / "sim.npy", sim)
+    _, expected_scores = topk_for_rows(R, sim, k=5)
+
+    scorer = ShardedScorer.spawn(str(tmp_path / "sim.npy"), n_shards=2)
+    try:
+        top, top_scores = scorer.topk(R, k=5)
+    finally:
+        scorer.close()
+
+    np.testing.assert_allclose(top_scores, expected_scores, rtol=1e-6)
+    # same items wherever scores are not tied
+    np.testing.assert_allclose(
+        sim[top[0]][:, R[0].indices].sum(axis=1), top_scores[0], rtol=1e-5
+    )
+
+
+def test_tcp_shards_require_an_authkey(monkeypatch, tmp_path):
+    monkeypatch.delenv("SHARD_AUTHKEY", raising=False)
+    with pytest.raises(ValueError, match="authkey"):
+        ShardedScorer.connect(["127.0.0.1:7001"])
+    with pytest.raises(ValueError, match="authkey"):
+        serve_shard("0.0.0.0:7001", str(tmp_path / "sim.npy"), 0, 10)
+
+
+def _slow_shard(conn, shard):
+    """Answers the first query too late, then serves normally."""
+    conn.send(shard.hello())
+    _, R_rows, k, exclude_seen, mask = conn.recv()
+    time.sleep(0.5)
+    try:
+        conn.send(shard.topk(R_rows[:0], k, exclude_seen, mask))  # a stale reply
+    except OSError:
+        return
+    _serve(conn, shard)
+
+
+def test_timed_out_shard_is_reset_before_the_next_query():
+    R, sim = _problem()
+    shard = ItemShard(sim, 0, 40)
+    servers = iter([_slow_shard, _serve])
+
+    def reconnect(i):
+        parent, child = mp.Pipe()
+        threading.Thread(target=next(servers), args=(child, shard), daemon=True).start()
+        return parent, None
+
+    scorer = ShardedScorer([reconnect(0)[0]], reconnect=reconnect, timeout=0.1)
+    try:
+        with pytest.raises(ConnectionError, match="TimeoutError"):
+            scorer.topk(R, k=5)
+        _, top_scores = scorer.topk(R, k=5)  # a fresh connection, not the late reply
+    finally:
+        scorer.close()
+    np.testing.assert_allclose(top_scores, topk_for_rows(R, sim, k=5)[1], rtol=1e-6)
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Cumulative import time budget per service module (seconds, from
+# `python -X importtime`). IMPORT_BUDGET_SCALE loosens them on slow runners.
+IMPORT_BUDGETS_S = {
+    "app.main": 1.0,
+    "src.api": 1.0,
+    "monitoring.evidently_app": 1.0,
+}
+# Must only be imported once artifacts/models load, never by importing the app
+HEAVY_MODULES = ["sklearn", "scipy", "pandas", "joblib", "evidently", "app.engine"]
+
+
+def _import_profile(module: str):
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT / "src"), str(ROOT)])}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1e6, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_S))
+def test_import_time_budget(module):
+    seconds, heavy = _import_profile(module)
+    assert heavy == [], f"{module} imports {heavy} at import time"
+    budget = IMPORT_BUDGETS_S[module] * float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+    assert (
+        seconds <= budget
+    ), f"{module} took {seconds:.2f}s to import (budget {budget:.2f}s)"
+
+
+def test_liveness_is_independent_of_readiness(tmp_path, monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "ARTIFACT_DIR", str(tmp_path))  # no artifacts here
+    monkeypatch.setattr(main, "STARTUP_MODE", "blocking")
+    with TestClient(main.app) as client:
+        assert client.get("/health/live").status_code == 200
+        ready = client.get("/health/ready")
+        assert ready.status_code == 503
+        assert ready.json()["detail"]["status"] == "error"
+        assert client.get("/recommend/some-user").status_code == 503
+    main.state.update(engine=None, status="not_started", error=None)
@@ -0,0 +1,69 @@
+# project/src/train_sentiment.py
+
+from __future__ import annotations
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import GroupShuffleSplit
+
+from ml.sentiment.model import SentimentModel, review_text, weak_labels
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Train the hashed n-gram review sentiment model"
+    )
+    ap.add_argument(
+        "--data-dir", default="data/processed", help="Folder with reviews/products.csv"
+    )
+    ap.add_argument("--out", default="artifacts/sentiment.joblib")
+    ap.add_argument(
+        "--pos-threshold", type=float, default=4.2, help="Product rating ≥ → positive"
+    )
+    ap.add_argument(
+        "--neg-threshold", type=float, default=3.9, help="Product rating ≤ → negative"
+    )
+    ap.add_argument("--n-features", type=int, default=2**20)
+    ap.add_argument("--C", type=float, default=4.0)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    data_dir = Path(args.data_dir)
+    reviews = pd.read_csv(data_dir / "reviews.csv", dtype={"product_id": str})
+    products = pd.read_csv(data_dir / "products.csv", dtype={"product_id": str})
+    df = weak_labels(reviews, products, pos=args.pos_threshold, neg=args.neg_threshold)
+    texts = review_text(df).tolist()
+    labels = df["label"].to_numpy()
+
+    # Labels come from product ratings, so hold out whole products to avoid leakage
+    split = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=args.seed)
+    tr, te = next(split.split(texts, labels, groups=df["product_id"]))
+    model = SentimentModel(n_features=args.n_features, C=args.C)
+    model.fit([texts[i] for i in tr], labels[tr])
+    probs = model.predict_proba([texts[i] for i in te])
+    metrics = {
+        "train_reviews": int(len(tr)),
+        "holdout_reviews": int(len(te)),
+        "positive_share": float(labels.mean()),
+        "holdout_accuracy": float(accuracy_score(labels[te], probs >= 0.5)),
+        "holdout_auc": (
+            float(roc_auc_score(labels[te], probs))
+            if np.unique(labels[te]).size > 1
+            else None
+        ),
+    }
+
+    # Final model on all labelled reviews
+    SentimentModel(n_features=args.n_features, C=args.C).fit(texts, labels).save(
+        args.out
+    )
+    print(json.dumps(metrics, indent=2))
+    print(f"Saved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()